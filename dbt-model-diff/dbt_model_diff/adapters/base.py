@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Iterable, Protocol
+from typing import Any, Iterable, Iterator, Optional, Protocol
 
 from dbt_model_diff.core.types import WarehouseConnInfo
 
@@ -11,6 +11,9 @@ class WarehouseAdapter(Protocol):
     """Warehouse adapter protocol."""
 
     name: str
+    # Rows per side above which the diff join is split into key-hash partitions
+    # run concurrently; None leaves partitioning to the warehouse.
+    join_partition_rows: Optional[int]
 
     def connect(self, info: WarehouseConnInfo):
         ...
@@ -27,20 +30,79 @@ class WarehouseAdapter(Protocol):
     def ctas_copy(self, conn, src_schema: str, src_table: str, dst_schema: str, dst_table: str) -> None:
         ...
 
+    def ctas_copy_cross(
+        self, src_conn, dst_conn, src_schema: str, src_table: str, dst_schema: str, dst_table: str
+    ) -> None:
+        ...
+
+    def create_temp_table(
+        self, conn, table: str, select_sql: str, key_cols: list[str], work_mem: Optional[str] = None
+    ) -> None:
+        ...
+
+    def drop_temp_table(self, conn, table: str) -> None:
+        ...
+
+    def create_scratch_table(
+        self,
+        conn,
+        schema: str,
+        table: str,
+        select_sql: str,
+        key_cols: list[str],
+        index_keys: bool = False,
+    ) -> None:
+        ...
+
+    def create_partitioned_scratch_table(
+        self, conn, schema: str, table: str, select_sql: str, part_expr: str, parts: int
+    ) -> list[str]:
+        """Split select_sql's rows by part_expr (0..parts-1) in one pass; return the partitions."""
+        ...
+
+    def touch_cache_table(self, conn, schema: str, table: str, group: str, keep: int) -> None:
+        """Mark a cached table as just used; drop all but the `keep` most recent of `group`."""
+        ...
+
+    def relation_exists(self, conn, schema: str, table: str) -> bool:
+        ...
+
     def list_columns(self, conn, schema: str, table: str) -> list[str]:
         ...
 
-    def rowcount(self, conn, relation_sql: str) -> int:
+    def list_columns_multi(
+        self, conn, relations: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], dict[str, str]]:
+        """Return {relation: {column: data type}} in column order."""
+        ...
+
+    def rowcount(self, conn, relation_sql: str, where: Optional[str] = None) -> int:
+        ...
+
+    def estimated_rowcount(self, conn, schema: str, table: str) -> Optional[int]:
+        """Return a metadata-only row count estimate, or None when unavailable."""
+        ...
+
+    def column_profile(
+        self,
+        conn,
+        schema: str,
+        table: str,
+        cols: list[str],
+        approx_distinct: bool = False,
+        where: Optional[str] = None,
+    ) -> tuple[int, dict[str, dict[str, int]]]:
+        """Return (row count, per-column nulls/distinct) from a single scan."""
         ...
 
-    def column_profile(self, conn, schema: str, table: str, cols: list[str]) -> dict[str, dict[str, int]]:
+    def build_row_hash_expr(self, cols: Iterable[str], algo: str = "fast") -> str:
         ...
 
-    def build_row_hash_expr(self, cols: Iterable[str]) -> str:
+    def build_bucket_hash_expr(self, cols: Iterable[str]) -> str:
         ...
 
     def scalar(self, conn, sql: str) -> int:
         ...
 
-    def rows(self, conn, sql: str) -> list[tuple[Any, ...]]:
+    def rows(self, conn, sql: str, limit: Optional[int] = None) -> Iterator[tuple[Any, ...]]:
         ...
@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Any, Iterable
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Iterable, Iterator, Optional
+from uuid import uuid4
 
 import psycopg2
 
@@ -12,7 +16,11 @@ from dbt_model_diff.core.types import WarehouseConnInfo
 class PostgresAdapter:
     """Postgres adapter used for dbt-model-diff."""
 
+    # Stateless: no per-instance __dict__, attribute lookups hit the class directly.
+    __slots__ = ()
     name = "postgres"
+    # Above this many rows a single hash join tends to spill to disk in batches.
+    join_partition_rows = 50_000_000
 
     def connect(self, info: WarehouseConnInfo):
         return psycopg2.connect(
@@ -23,7 +31,9 @@ class PostgresAdapter:
             password=info.password,
         )
 
-    def quote_ident(self, ident: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def quote_ident(ident: str) -> str:
         return '"' + ident.replace('"', '""') + '"'
 
     def ensure_schema(self, conn, schema: str) -> None:
@@ -36,13 +46,171 @@ class PostgresAdapter:
 
     def ctas_copy(self, conn, src_schema: str, src_table: str, dst_schema: str, dst_table: str) -> None:
         q = self.quote_ident
+        # Statements are sent as one batch: a single round trip instead of one each.
         with conn.cursor() as cur:
-            cur.execute(f"drop table if exists {q(dst_schema)}.{q(dst_table)};")
             cur.execute(
+                f"drop table if exists {q(dst_schema)}.{q(dst_table)}; "
                 f"create table {q(dst_schema)}.{q(dst_table)} as "
                 f"select * from {q(src_schema)}.{q(src_table)};"
             )
 
+    def ctas_copy_cross(
+        self, src_conn, dst_conn, src_schema: str, src_table: str, dst_schema: str, dst_table: str
+    ) -> None:
+        # CTAS cannot reach another database, so recreate the column list on the
+        # destination and stream the rows across with binary COPY through a pipe:
+        # the destination loads while the source is still sending.
+        q = self.quote_ident
+        sql = """
+            select a.attname, format_type(a.atttypid, a.atttypmod)
+            from pg_catalog.pg_attribute a
+            join pg_catalog.pg_class c on c.oid = a.attrelid
+            join pg_catalog.pg_namespace n on n.oid = c.relnamespace
+            where n.nspname = %s and c.relname = %s and a.attnum > 0 and not a.attisdropped
+            order by a.attnum
+        """
+        with src_conn.cursor() as cur:
+            cur.execute(sql, (src_schema, src_table))
+            cols = cur.fetchall()
+        if not cols:
+            raise RuntimeError(f"Relation not found: {src_schema}.{src_table}")
+
+        src = f"{q(src_schema)}.{q(src_table)}"
+        dst = f"{q(dst_schema)}.{q(dst_table)}"
+        with dst_conn.cursor() as cur:
+            cur.execute(
+                f"drop table if exists {dst}; "
+                f"create table {dst} ({', '.join(f'{q(n)} {t}' for n, t in cols)});"
+            )
+
+        def load(reader) -> None:
+            # Closing the read end on failure unblocks the writer with EPIPE.
+            with reader, dst_conn.cursor() as cur:
+                cur.copy_expert(f"copy {dst} from stdin with (format binary)", reader)
+
+        read_fd, write_fd = os.pipe()
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            loaded = pool.submit(load, open(read_fd, "rb"))
+            try:
+                with open(write_fd, "wb") as writer, src_conn.cursor() as cur:
+                    cur.copy_expert(f"copy {src} to stdout with (format binary)", writer)
+            except BrokenPipeError:
+                pass  # the load failed; its exception is raised below
+            loaded.result()
+
+    def create_temp_table(
+        self, conn, table: str, select_sql: str, key_cols: list[str], work_mem: Optional[str] = None
+    ) -> None:
+        q = self.quote_ident
+        # Temp tables are never auto-analyzed; give the planner real stats for the join.
+        sql = (
+            f"drop table if exists {q(table)}; "
+            f"create temp table {q(table)} as {select_sql}; "
+            f"analyze {q(table)};"
+        )
+        with conn.cursor() as cur:
+            if work_mem is None:
+                cur.execute(sql)
+                return
+            # SET LOCAL scopes the setting to this transaction, so it never leaks
+            # into later statements on the (pooled, autocommit) connection.
+            setting = cur.mogrify("set local work_mem = %s;", (work_mem,)).decode()
+            try:
+                cur.execute(f"begin; {setting} {sql} commit;")
+            except Exception:
+                cur.execute("rollback;")
+                raise
+
+    def drop_temp_table(self, conn, table: str) -> None:
+        with conn.cursor() as cur:
+            cur.execute(f"drop table if exists {self.quote_ident(table)};")
+
+    def create_scratch_table(
+        self,
+        conn,
+        schema: str,
+        table: str,
+        select_sql: str,
+        key_cols: list[str],
+        index_keys: bool = False,
+    ) -> None:
+        # Like a temp table (no WAL) but visible to other sessions, so each side
+        # can be written from its own connection. It is written once, analyzed
+        # here and dropped with the diff schema, so autovacuum is kept off it
+        # rather than rescanning it mid-diff.
+        q = self.quote_ident
+        rel = f"{q(schema)}.{q(table)}"
+        index = ""
+        if index_keys:
+            # Ordered key access lets the planner merge-join without sorting.
+            index = f"create index on {rel} ({', '.join(q(k) for k in key_cols)}); "
+        with conn.cursor() as cur:
+            cur.execute(
+                f"drop table if exists {rel}; "
+                f"create unlogged table {rel} with (autovacuum_enabled = off) as {select_sql}; "
+                f"{index}"
+                f"analyze {rel};"
+            )
+
+    def create_partitioned_scratch_table(
+        self, conn, schema: str, table: str, select_sql: str, part_expr: str, parts: int
+    ) -> list[str]:
+        # A list-partitioned table routes each row of a single pass over
+        # select_sql into its partition, so every partition is a plain table
+        # that later reads scan on its own. The partitions are unlogged, like
+        # scratch tables; the column list comes from a never-filled template.
+        q = self.quote_ident
+        rel = f"{q(schema)}.{q(table)}"
+        template = f"{q(schema)}.{q(table + '__template')}"
+        src = f"select s.*, {part_expr} as dbt_model_diff_part from ({select_sql}) s"
+        partitions = [f"{q(schema)}.{q(f'{table}__{p}')}" for p in range(parts)]
+        with conn.cursor() as cur:
+            cur.execute(
+                f"drop table if exists {rel}, {template}; "
+                f"create unlogged table {template} as {src} with no data; "
+                f"create table {rel} (like {template}) partition by list (dbt_model_diff_part); "
+                f"drop table {template}; "
+                + "".join(
+                    f"create unlogged table {part} partition of {rel} for values in ({p}) "
+                    f"with (autovacuum_enabled = off); "
+                    for p, part in enumerate(partitions)
+                )
+                + f"insert into {rel} {src}; "
+                f"analyze {rel};"
+            )
+        return partitions
+
+    def touch_cache_table(self, conn, schema: str, table: str, group: str, keep: int) -> None:
+        # Last use is tracked in a small index table next to the cached tables.
+        q = self.quote_ident
+        index = f"{q(schema)}.{q('cache_index')}"
+        with conn.cursor() as cur:
+            cur.execute(
+                f"create table if not exists {index} "
+                f"(table_name text primary key, grp text not null, used_at timestamptz not null); "
+                f"insert into {index} values (%s, %s, now()) "
+                f"on conflict (table_name) do update set used_at = excluded.used_at; "
+                f"select table_name from {index} where grp = %s order by used_at desc offset %s;",
+                (table, group, group, keep),
+            )
+            stale = [r[0] for r in cur.fetchall()]
+            if stale:
+                cur.execute(
+                    "".join(f"drop table if exists {q(schema)}.{q(t)}; " for t in stale)
+                    + f"delete from {index} where table_name in %s;",
+                    (tuple(stale),),
+                )
+
+    def relation_exists(self, conn, schema: str, table: str) -> bool:
+        sql = """
+            select 1
+            from information_schema.tables
+            where table_schema = %s and table_name = %s
+        """
+        with conn.cursor() as cur:
+            cur.execute(sql, (schema, table))
+            return cur.fetchone() is not None
+
     def list_columns(self, conn, schema: str, table: str) -> list[str]:
         sql = """
             select column_name
@@ -54,8 +222,43 @@ class PostgresAdapter:
             cur.execute(sql, (schema, table))
             return [r[0] for r in cur.fetchall()]
 
-    def rowcount(self, conn, relation_sql: str) -> int:
-        return self.scalar(conn, f"select count(*) from {relation_sql} t")
+    def list_columns_multi(
+        self, conn, relations: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], dict[str, str]]:
+        out: dict[tuple[str, str], dict[str, str]] = {rel: {} for rel in relations}
+        if not relations:
+            return out
+
+        # Read pg_attribute directly: information_schema.columns is a view that
+        # joins a dozen catalogs and evaluates privilege checks per column.
+        match = " or ".join(["(n.nspname = %s and c.relname = %s)"] * len(relations))
+        sql = f"""
+            select n.nspname, c.relname, a.attname, format_type(a.atttypid, null)
+            from pg_catalog.pg_attribute a
+            join pg_catalog.pg_class c on c.oid = a.attrelid
+            join pg_catalog.pg_namespace n on n.oid = c.relnamespace
+            where ({match}) and a.attnum > 0 and not a.attisdropped
+            order by n.nspname, c.relname, a.attnum
+        """
+        params = [v for rel in relations for v in rel]
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            for schema, table, column, data_type in cur.fetchall():
+                out[(schema, table)][column] = data_type
+        return out
+
+    def rowcount(self, conn, relation_sql: str, where: Optional[str] = None) -> int:
+        predicate = f" where {where}" if where else ""
+        return self.scalar(conn, f"select count(*) from {relation_sql} t{predicate}")
+
+    def estimated_rowcount(self, conn, schema: str, table: str) -> Optional[int]:
+        # The planner's estimate: reltuples once analyzed, otherwise the current
+        # page count times the estimated tuple density, so it also covers a
+        # freshly created snapshot that has never been analyzed.
+        with conn.cursor() as cur:
+            cur.execute(f"explain (format json) select * from {self.quote_ident(schema)}.{self.quote_ident(table)}")
+            plan = cur.fetchone()[0]
+        return int(plan[0]["Plan"]["Plan Rows"])
 
     def scalar(self, conn, sql: str) -> int:
         with conn.cursor() as cur:
@@ -63,39 +266,83 @@ class PostgresAdapter:
             row = cur.fetchone()
             return int(row[0]) if row and row[0] is not None else 0
 
-    def rows(self, conn, sql: str) -> list[tuple[Any, ...]]:
-        with conn.cursor() as cur:
+    def rows(self, conn, sql: str, limit: Optional[int] = None) -> Iterator[tuple[Any, ...]]:
+        if limit is not None:
+            # Small bounded results: a plain cursor is one round trip, whereas a
+            # named cursor adds DECLARE/FETCH/CLOSE for the same handful of rows.
+            with conn.cursor() as cur:
+                cur.execute(sql)
+                yield from cur.fetchmany(limit)
+            return
+        # Server-side cursor streams itersize rows at a time instead of buffering the
+        # whole result; WITH HOLD lets it live outside a transaction (autocommit).
+        with conn.cursor(name=f"dbt_model_diff_{uuid4().hex}", withhold=True) as cur:
+            cur.itersize = 10_000
             cur.execute(sql)
-            return cur.fetchall()
-
-    def column_profile(self, conn, schema: str, table: str, cols: list[str]) -> dict[str, dict[str, int]]:
-        if not cols:
-            return {}
+            yield from cur
 
+    def column_profile(
+        self,
+        conn,
+        schema: str,
+        table: str,
+        cols: list[str],
+        approx_distinct: bool = False,
+        where: Optional[str] = None,
+    ) -> tuple[int, dict[str, dict[str, int]]]:
+        # Postgres has no built-in approximate distinct aggregate; approximate
+        # counts use the postgresql-hll extension when it is installed and are
+        # exact otherwise. Planner n_distinct estimates are not used: they would
+        # mean ANALYZE-ing the user's relation, and two samples of identical
+        # sides can disagree. The row count and null counts are always exact and
+        # ride along in the same scan.
         q = self.quote_ident
-        parts: list[str] = []
-        for c in cols:
-            qc = q(c)
-            parts.append(f"sum(({qc} is null)::int) as {q(c + '__nulls')}")
-            parts.append(f"count(distinct {qc}) as {q(c + '__distinct')}")
-        sql = f"select {', '.join(parts)} from {q(schema)}.{q(table)}"
-
+        rel = f"{q(schema)}.{q(table)}"
         with conn.cursor() as cur:
+            use_hll = False
+            if approx_distinct:
+                cur.execute("select 1 from pg_extension where extname = 'hll'")
+                use_hll = cur.fetchone() is not None
+
+            parts: list[str] = ["count(*)"]
+            for c in cols:
+                qc = q(c)
+                parts.append(f"count(*) filter (where {qc} is null) as {q(c + '__nulls')}")
+                if use_hll:
+                    distinct = f"coalesce(round(hll_cardinality(hll_add_agg(hll_hash_any({qc}))))::bigint, 0)"
+                else:
+                    distinct = f"count(distinct {qc})"
+                parts.append(f"{distinct} as {q(c + '__distinct')}")
+            predicate = f" where {where}" if where else ""
+            sql = f"select {', '.join(parts)} from {rel} t{predicate}"
+
             cur.execute(sql)
             row = cur.fetchone()
 
+        # Every aggregate is bigint, which psycopg2 already decodes to int.
+        count = row[0]
         out: dict[str, dict[str, int]] = {}
-        idx = 0
-        for c in cols:
-            out[c] = {"nulls": int(row[idx]), "distinct": int(row[idx + 1])}
-            idx += 2
-        return out
+        for i, c in enumerate(cols):
+            out[c] = {"nulls": row[2 * i + 1], "distinct": row[2 * i + 2]}
+        return count, out
 
-    def build_row_hash_expr(self, cols: Iterable[str]) -> str:
+    def build_row_hash_expr(self, cols: Iterable[str], algo: str = "fast") -> str:
         cols = list(cols)
+        if algo == "md5":
+            if not cols:
+                return "md5('')"
+
+            parts = [f"coalesce({self.quote_ident(c)}::text,'<NULL>')" for c in cols]
+            concat = " || '|' || ".join(parts)
+            return f"md5({concat})"
+
         if not cols:
-            return "md5('')"
+            return "0::bigint"
+        # row(...)::text quotes values and leaves NULLs empty, so it already keeps
+        # column boundaries and NULL vs '' apart; a 64-bit bigint hash compares cheaply.
+        return f"hashtextextended(row({', '.join(self.quote_ident(c) for c in cols)})::text, 0)"
 
+    def build_bucket_hash_expr(self, cols: Iterable[str]) -> str:
         parts = [f"coalesce({self.quote_ident(c)}::text,'<NULL>')" for c in cols]
-        concat = " || '|' || ".join(parts)
-        return f"md5({concat})"
+        concat = " || '|' || ".join(parts) or "''"
+        return f"hashtextextended({concat}, 0)"
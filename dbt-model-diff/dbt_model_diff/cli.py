@@ -12,7 +12,7 @@ from dbt_model_diff.adapters.postgres import PostgresAdapter
 from dbt_model_diff.adapters.redshift import RedshiftAdapter
 from dbt_model_diff.core.dbt_profiles import load_conn_info_and_type
 from dbt_model_diff.core.diff_flow import run_diff
-from dbt_model_diff.formatters.json_fmt import render as render_json
+from dbt_model_diff.formatters.json_fmt import write as write_json
 from dbt_model_diff.formatters.markdown_fmt import render as render_markdown
 from dbt_model_diff.formatters.rich_fmt import render as render_rich
 
@@ -51,6 +51,23 @@ def diff_cmd(
         None, help="dbt profile name (optional)"),
     target: Optional[str] = typer.Option(
         None, help="dbt target name (optional)"),
+    head_target: Optional[str] = typer.Option(
+        None, help="dbt target for the HEAD build (optional, defaults to --target)"),
+    parallel_build: bool = typer.Option(
+        True,
+        "--parallel-build/--no-parallel-build",
+        help="Build BASE and HEAD concurrently when --target and --head-target are set and differ",
+    ),
+    reuse_base: bool = typer.Option(
+        False,
+        "--reuse-base/--no-reuse-base",
+        help="Reuse a cached BASE snapshot when the project at --base is unchanged",
+    ),
+    cache_worktrees: bool = typer.Option(
+        False,
+        "--cache-worktrees/--no-cache-worktrees",
+        help="Keep git worktrees in the user cache dir, keyed by commit, and reuse them on later runs",
+    ),
     where: Optional[str] = typer.Option(
         None, help="Optional SQL predicate applied to both sides"),
     sample: int = typer.Option(
@@ -62,6 +79,33 @@ def diff_cmd(
         "--col-stats/--no-col-stats",
         help="Print/emit null% + distinct + uniqueness% per common column",
     ),
+    approx_distinct: bool = typer.Option(
+        True,
+        "--approx-distinct/--exact-distinct",
+        help="Use approximate distinct counts in column stats on tables of 10M+ rows",
+    ),
+    hash_algo: str = typer.Option(
+        "fast",
+        "--hash",
+        help="Row hash for change detection: fast | md5",
+    ),
+    bucket_diff: bool = typer.Option(
+        False,
+        "--bucket-diff/--no-bucket-diff",
+        help="Compare per-bucket checksums first and only join rows in buckets that differ",
+    ),
+    index_keys: bool = typer.Option(
+        False,
+        "--index-keys/--no-index-keys",
+        help="Index key columns of the hashed tables before the diff join (Postgres)",
+    ),
+    work_mem: Optional[str] = typer.Option(
+        None, help="Postgres work_mem for the diff join, e.g. 256MB (optional)"),
+    sample_fraction: float = typer.Option(
+        1.0,
+        "--sample-fraction",
+        help="Row-level diff on this fraction of keys (0 < m <= 1), picked by key hash; counts are scaled up",
+    ),
     fmt: str = typer.Option(
         "rich",
         "--format",
@@ -85,15 +129,46 @@ Args:
     profiles_dir: Path to the dbt profiles directory containing profiles.yml (default: current directory).
     profile: Optional dbt profile name to use from profiles.yml.
     target: Optional dbt target name to use within the profile.
+    head_target: Optional dbt target for the HEAD build (defaults to target). Point it at a
+                 target with a different schema to let BASE and HEAD build concurrently. If it
+                 points at another database, HEAD is streamed into the diff schema (Postgres).
+    parallel_build: If True, build BASE and HEAD concurrently when target and head_target are
+                    both set and differ (default: True).
+    reuse_base: If True, cache the BASE snapshot in the dbt_model_diff_cache schema keyed by
+                the project content at base, and skip the BASE build on later runs while that
+                content is unchanged. The most recently used few per model are kept. Upstream
+                data changes are not detected (default: False).
+    cache_worktrees: If True, keep the BASE/HEAD worktrees under $XDG_CACHE_HOME/dbt-model-diff
+                     keyed by commit SHA and reuse them when a ref resolves to the same commit,
+                     dbt's target/ state included. The most recently used few are kept; do not
+                     share the cache between concurrent runs (default: False).
     where: Optional SQL WHERE clause to filter rows on both sides of the comparison.
     sample: Number of changed keys to sample for detailed row-level diff output (default: 20).
     keep_schemas: If True, preserves diff schema and temporary tables after execution (default: False).
     col_stats: If True, include per-column statistics (null%, distinct count, uniqueness%) 
                in output (default: True).
+    approx_distinct: If True, use approximate distinct counts for column stats: APPROXIMATE
+                     COUNT(DISTINCT) on Redshift; on Postgres, HyperLogLog when the hll extension
+                     is installed, otherwise exact counts. Tables under 10M rows are always
+                     counted exactly (default: True).
+    hash_algo: Row hash used to detect changed rows (default: "fast"). Options: "fast"
+               (64-bit hashtextextended on Postgres, fnv_hash on Redshift), "md5".
+    bucket_diff: If True, narrow the row-level join to key buckets whose checksums differ
+                 between base and head (default: False).
+    index_keys: If True, index the key columns of both hashed tables before the diff join so
+                Postgres can merge-join them without sorting; useful when both sides are too
+                large to hash in memory (default: False).
+    work_mem: Optional Postgres work_mem (e.g. "256MB") applied with SET LOCAL to the diff
+              join only, so its hash join does not spill to disk.
+    sample_fraction: Fraction of keys (0 < m <= 1) read by the row-level diff (default: 1.0).
+                     Keys are picked by a hash of the key columns, so BASE and HEAD keep the
+                     same keys; added/removed/changed counts are scaled up to estimates.
     fmt: Output format for results (default: "rich"). Options: "rich", "json", "markdown".
 
 Raises:
-    typer.BadParameter: If the specified format is not one of: rich, json, markdown.
+    typer.BadParameter: If the specified format is not one of: rich, json, markdown,
+                        --hash is not one of: fast, md5, --sample-fraction is not in (0, 1],
+                        or --head-target uses a different warehouse type than --target.
     Exception: If database connection cannot be established or diff operation fails.
 
 Returns:
@@ -104,6 +179,13 @@ Returns:
         raise typer.BadParameter(
             "--format must be one of: rich, json, markdown")
 
+    hash_algo = hash_algo.lower().strip()
+    if hash_algo not in {"fast", "md5"}:
+        raise typer.BadParameter("--hash must be one of: fast, md5")
+
+    if not 0 < sample_fraction <= 1:
+        raise typer.BadParameter("--sample-fraction must be in (0, 1]")
+
     project_dir = project_dir.expanduser().resolve()
     profiles_dir = profiles_dir.expanduser().resolve()
 
@@ -117,6 +199,17 @@ Returns:
     )
     adapter = _get_adapter(adapter_type)
 
+    head_conn_info = None
+    if head_target and head_target != target:
+        head_conn_info, head_type = load_conn_info_and_type(
+            profiles_dir=profiles_dir,
+            profile=profile,
+            target=head_target,
+        )
+        if head_type != adapter_type:
+            raise typer.BadParameter(
+                "--head-target must use the same warehouse type as --target")
+
     result = run_diff(
         adapter=adapter,
         conn_info=conn_info,
@@ -132,6 +225,17 @@ Returns:
         col_stats=col_stats,
         target=target,
         verbose=(fmt == "rich"),
+        approx_distinct=approx_distinct,
+        hash_algo=hash_algo,
+        bucket_diff=bucket_diff,
+        head_target=head_target,
+        parallel_build=parallel_build,
+        reuse_base=reuse_base,
+        head_conn_info=head_conn_info,
+        index_keys=index_keys,
+        work_mem=work_mem,
+        sample_fraction=sample_fraction,
+        cache_worktrees=cache_worktrees,
     )
 
     if fmt == "rich":
@@ -139,7 +243,7 @@ Returns:
         return
 
     if fmt == "json":
-        sys.stdout.write(render_json(result) + "\n")
+        write_json(result, sys.stdout)
         return
 
     sys.stdout.write(render_markdown(result) + "\n")
@@ -0,0 +1,93 @@
+"""Process-wide warehouse connection pool.
+
+Connections are opened through the adapter (so warehouse-specific connect logic
+stays in one place), handed out in autocommit mode, and returned for reuse
+instead of being closed. Idle connections are closed at interpreter exit.
+"""
+
+from __future__ import annotations
+
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from dbt_model_diff.adapters.base import WarehouseAdapter
+from dbt_model_diff.core.types import WarehouseConnInfo
+
+MAX_CONNS = 4
+
+
+class _Pool:
+    """Bounded pool of connections for one adapter + connection info."""
+
+    def __init__(self, adapter: WarehouseAdapter, info: WarehouseConnInfo, maxconn: int):
+        self._adapter = adapter
+        self._info = info
+        self._idle: list = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self):
+        self._slots.acquire()
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None or conn.closed:
+                conn = self._adapter.connect(self._info)
+            conn.autocommit = True
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn) -> None:
+        try:
+            # Only keep connections that are open and not mid-transaction/errored.
+            if not conn.closed and conn.info.transaction_status == TRANSACTION_STATUS_IDLE:
+                with self._lock:
+                    self._idle.append(conn)
+            elif not conn.closed:
+                conn.close()
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_POOLS: dict[tuple[str, WarehouseConnInfo], _Pool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+@contextmanager
+def get_conn(adapter: WarehouseAdapter, info: WarehouseConnInfo) -> Iterator:
+    """Borrow a pooled autocommit connection, returning it to the pool on exit."""
+    key = (adapter.name, info)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = _Pool(adapter, info, MAX_CONNS)
+
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+@atexit.register
+def close_all() -> None:
+    """Close every idle pooled connection."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        pool.closeall()
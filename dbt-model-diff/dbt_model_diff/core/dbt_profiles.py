@@ -2,14 +2,46 @@
 
 from __future__ import annotations
 
+import copy
 import os
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Optional, Tuple
 
 import yaml
 
 from dbt_model_diff.core.types import WarehouseConnInfo
 
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader
+
+# path -> ((mtime_ns, size), parsed document), least recently used first
+_YAML_CACHE: OrderedDict[str, tuple[tuple[int, int], Any]] = OrderedDict()
+_YAML_CACHE_MAX = 16
+
+
+def _load_yaml(path: Path) -> Any:
+    """Parse a YAML file, reusing the last parse while its mtime and size are unchanged.
+
+    Callers get a deep copy so mutating the result cannot corrupt the cache.
+    """
+    key = str(path)
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _YAML_CACHE.get(key)
+    if cached is not None and cached[0] == stamp:
+        _YAML_CACHE.move_to_end(key)
+        return copy.deepcopy(cached[1])
+
+    data = yaml.load(path.read_text(), Loader=_SafeLoader)
+    _YAML_CACHE[key] = (stamp, data)
+    _YAML_CACHE.move_to_end(key)
+    while len(_YAML_CACHE) > _YAML_CACHE_MAX:
+        _YAML_CACHE.popitem(last=False)
+    return copy.deepcopy(data)
+
 
 def load_conn_info_and_type(
     profiles_dir: Path,
@@ -38,7 +70,7 @@ def load_conn_info_and_type(
     if not profiles_path.exists():
         raise FileNotFoundError(f"profiles.yml not found at: {profiles_path}")
 
-    data = yaml.safe_load(profiles_path.read_text())
+    data = _load_yaml(profiles_path)
     if not isinstance(data, dict) or not data:
         raise ValueError("profiles.yml is empty or invalid")
 
@@ -8,7 +8,43 @@ from typing import Optional
 from dbt_model_diff.core.subprocess_utils import run
 
 
-def dbt_build(project_dir: Path, profiles_dir: Path, model: str, target: Optional[str]) -> None:
+def _invoke_in_process(args: list[str]) -> bool:
+    """Run dbt via dbt-core's programmatic API when it is importable.
+
+    Returns False (without running anything) if dbt-core is not installed in
+    this interpreter, so the caller can fall back to the `dbt` executable.
+
+    Raises:
+        RuntimeError: If the dbt invocation fails.
+    """
+    try:
+        from dbt.cli.main import dbtRunner
+    except ImportError:
+        return False
+
+    res = dbtRunner().invoke(args)
+    if res.success:
+        return True
+
+    if res.exception is not None:
+        detail = str(res.exception)
+    else:
+        detail = "\n".join(
+            f"{r.node.name}: {r.status} {r.message or ''}".rstrip()
+            for r in (res.result or [])
+            if str(r.status) not in {"success", "pass", "skipped"}
+        )
+    raise RuntimeError(f"Command failed:\n  dbt {' '.join(args)}\n\n{detail}")
+
+
+def dbt_build(
+    project_dir: Path,
+    profiles_dir: Path,
+    model: str,
+    target: Optional[str],
+    in_process: bool = False,
+    stream: bool = False,
+) -> None:
     """Run `dbt build --select <model>`.
 
     Args:
@@ -16,15 +52,21 @@ def dbt_build(project_dir: Path, profiles_dir: Path, model: str, target: Optiona
         profiles_dir: Path to the dbt profiles directory.
         model: Name of the model to build.
         target: Optional target name to use in the dbt profile.
+        in_process: If True, invoke dbt through dbt-core's Python API (skipping
+            interpreter start-up) when it is importable. dbt's programmatic API
+            is not safe for concurrent invocations, so leave this off for
+            builds that run in parallel.
+        stream: If True, run dbt as a subprocess (even with in_process) and echo
+            its output to stderr as it runs instead of buffering it until exit.
 
     Raises:
-        RuntimeError: If dbt_project.yml is not found in the project directory.
+        RuntimeError: If dbt_project.yml is not found in the project directory,
+            or the build fails.
     """
     if not (project_dir / "dbt_project.yml").exists():
         raise RuntimeError(f"dbt_project.yml not found in: {project_dir}")
 
-    cmd = [
-        "dbt",
+    args = [
         "build",
         "--project-dir",
         str(project_dir),
@@ -32,8 +74,18 @@ def dbt_build(project_dir: Path, profiles_dir: Path, model: str, target: Optiona
         str(profiles_dir),
         "--select",
         model,
+        # One model is built: look relations up as needed instead of listing every
+        # schema up front, and skip the usage-stats calls to dbt Labs.
+        "--no-populate-cache",
+        "--no-send-anonymous-usage-stats",
     ]
     if target:
-        cmd += ["--target", target]
+        args += ["--target", target]
+
+    # Keep dbt's own logging off stdout: it may carry --format json output. An
+    # in-process dbt can only log to stdout, so it runs quietly, and a streamed
+    # build goes through the subprocess, whose output is echoed to stderr.
+    if in_process and not stream and _invoke_in_process(["--quiet", *args]):
+        return
 
-    run(cmd, cwd=project_dir)
+    run(["dbt", *args], cwd=project_dir, stream=stream, keep_output=False)
@@ -1,21 +1,241 @@
-"""End-to-end diff flow (Option 2): build -> copy -> build -> copy -> compare.
+"""End-to-end diff flow (Option 2): build -> copy -> build -> [copy] -> compare.
 
 This module computes a structured result dict. Rendering is handled by formatters.
 """
 
 from __future__ import annotations
 
+import hashlib
+import os
 import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
 from pathlib import Path
 from typing import Any, Optional
 
 from dbt_model_diff.adapters.base import WarehouseAdapter
+from dbt_model_diff.core.conn_pool import MAX_CONNS, get_conn
 from dbt_model_diff.core.dbt_runner import dbt_build
 from dbt_model_diff.core.manifest import get_model_node, parse_relation_name_pg
 from dbt_model_diff.core.subprocess_utils import run
 from dbt_model_diff.core.types import WarehouseConnInfo
-from dbt_model_diff.core.util import pct, sanitize_ident
+from dbt_model_diff.core.util import pct, sanitize_ident, user_cache_dir
+
+# Below this many rows (by the warehouse's table size estimate) exact
+# count(distinct) is cheap enough that --approx-distinct keeps exact column profiles.
+APPROX_DISTINCT_MIN_ROWS = 10_000_000
+
+# Upper bound on the key-hash partitions of a very large diff join (see the
+# adapter's join_partition_rows).
+MAX_JOIN_PARTITIONS = 16
+
+# Stand-in (read only) for a column missing from a side's profile.
+_EMPTY_PROFILE = {"nulls": 0, "distinct": 0}
+
+# Resolution of --sample-fraction: keys are split into this many hash slots.
+SAMPLE_SLOTS = 10_000
+
+# Schema holding BASE snapshots reused across runs (--reuse-base).
+BASE_CACHE_SCHEMA = "dbt_model_diff_cache"
+
+# Cached BASE snapshots (--reuse-base) kept per model, most recently used first.
+BASE_CACHE_MAX = 4
+
+# Cached worktrees (--cache-worktrees) kept per repository, most recently used first.
+WORKTREE_CACHE_MAX = 4
+
+# Column types (as named by the Postgres/Redshift catalogs) whose values are
+# equal exactly when their text forms are. A lone non-key column of one of
+# these types is compared as is instead of being hashed. numeric, real and
+# double precision are left out: 1.0 = 1.00 and -0.0 = 0.0 although the hashed
+# text differs, so the verdict would depend on how many columns there are.
+DIRECT_COMPARE_TYPES = frozenset({
+    "smallint", "integer", "bigint",
+    "boolean", "character", "character varying", "text", "uuid", "date",
+    "timestamp without time zone", "timestamp with time zone",
+})
+
+
+def _profiles_digest(profiles_dir: Path) -> str:
+    """Short content digest of profiles.yml ("" when it is missing)."""
+    profiles = profiles_dir / "profiles.yml"
+    return hashlib.sha256(profiles.read_bytes()).hexdigest()[:16] if profiles.exists() else ""
+
+
+def _base_cache_table(
+    worktree: Path, project_rel: Path, model: str, profiles_dir: Path, target: Optional[str]
+) -> str:
+    """Name the cached BASE snapshot after the content of the project it was built from.
+
+    The git tree id of the project directory changes whenever any model, macro,
+    seed or project file in it changes, so it stands in for hashing the model and
+    its upstream SQL without asking dbt for the lineage.
+    """
+    rel = "" if project_rel == Path(".") else project_rel.as_posix()
+    tree = run(["git", "-C", str(worktree), "rev-parse", f"HEAD:{rel}"]).strip()
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"{tree}|{model}|{target or ''}|{_profiles_digest(profiles_dir)}".encode())
+    return f"{sanitize_ident(model, max_len=40)}__{h.hexdigest()}"
+
+
+def _checkout_worktree(worktree: Path, project_rel: Path, workers: int) -> None:
+    """Populate a ``--no-checkout`` worktree, materializing only the dbt project if possible.
+
+    A project in a subdirectory of the repo is checked out on its own; the rest
+    of the tree is only written when the project declares ``local:`` packages,
+    which may live outside it. ``checkout.workers`` enables git's parallel
+    checkout (git >= 2.32; older git ignores it).
+    """
+    git = ["git", "--literal-pathspecs", "-c", f"checkout.workers={workers}", "-C", str(worktree)]
+    if project_rel != Path("."):
+        run([*git, "checkout", "HEAD", "--", project_rel.as_posix()])
+        project = worktree / project_rel
+        if not any(
+            "local:" in (project / name).read_text(errors="ignore")
+            for name in ("packages.yml", "dependencies.yml")
+            if (project / name).exists()
+        ):
+            return
+    run([*git, "reset", "--hard", "--quiet"])
+
+
+def _seed_partial_parse(src_project: Path, dst_project: Path) -> None:
+    """Copy dbt's partial parse state into a worktree project that has none yet.
+
+    dbt checks the saved file checksums against the checkout and reparses only
+    the files that differ (all of them if the dbt version, profile or vars
+    changed), so a fresh worktree skips most of a full project parse.
+    """
+    src = src_project / "target" / "partial_parse.msgpack"
+    dst = dst_project / "target" / "partial_parse.msgpack"
+    if dst.exists() or not src.is_file():
+        return
+    try:
+        dst.parent.mkdir(exist_ok=True)
+        shutil.copyfile(src, dst)
+    except OSError:
+        pass
+
+
+def _same_project(repo_root: Path, project_rel: Path, base_ref: str, head_ref: str) -> bool:
+    """Return True when both refs hold identical dbt project content.
+
+    Compares the git tree ids of the project directory (of the whole repo when
+    the project declares ``local:`` packages, which may live outside it), so a
+    match means both builds would run the same SQL.
+    """
+    git = ["git", "-C", str(repo_root)]
+    rel = "" if project_rel == Path(".") else project_rel.as_posix()
+    base_tree, head_tree = run([*git, "rev-parse", f"{base_ref}:{rel}", f"{head_ref}:{rel}"]).split()
+    if base_tree != head_tree:
+        return False
+    if rel:
+        names = run([*git, "ls-tree", "--name-only", base_tree]).splitlines()
+        for name in ("packages.yml", "dependencies.yml"):
+            if name in names and "local:" in run([*git, "cat-file", "blob", f"{base_tree}:{name}"]):
+                base_root, head_root = run(
+                    [*git, "rev-parse", f"{base_ref}^{{tree}}", f"{head_ref}^{{tree}}"]
+                ).split()
+                return base_root == head_root
+    return True
+
+
+def _worktree_cache_dir(repo_root: Path) -> Path:
+    """Return the directory holding --cache-worktrees checkouts of one repository."""
+    return user_cache_dir() / "worktrees" / hashlib.sha256(str(repo_root).encode()).hexdigest()[:16]
+
+
+def _worktree_at(worktree: Path, sha: str) -> bool:
+    """Return True if `worktree` is a live git worktree checked out at commit `sha`."""
+    if not (worktree / ".git").is_file():
+        return False
+    try:
+        return run(["git", "-C", str(worktree), "rev-parse", "HEAD"]).strip() == sha
+    except Exception:
+        return False
+
+
+def _prune_worktree_cache(repo_root: Path, cache_dir: Path, keep: set[Path]) -> None:
+    """Delete all but the WORKTREE_CACHE_MAX most recently used cached worktrees."""
+    entries = sorted(
+        (p for p in cache_dir.iterdir() if p.is_dir()),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    stale = [p for p in entries if p not in keep][max(0, WORKTREE_CACHE_MAX - len(keep)):]
+    if not stale:
+        return
+    for wt in stale:
+        shutil.rmtree(wt, ignore_errors=True)
+    run(["git", "-C", str(repo_root), "worktree", "prune"])
+
+
+def _bucket_diff(
+    adapter: WarehouseAdapter,
+    conn,
+    base_h: str,
+    head_h: str,
+    key_cols: list[str],
+    fanout: int = 256,
+    max_depth: int = 4,
+    min_rows: int = 10_000,
+) -> Optional[str]:
+    """Narrow the row-level diff to key buckets whose checksums disagree.
+
+    Both hashed tables (``base_h``/``head_h``, quoted relation names) are
+    bucketed by ``key_hash`` and each bucket is reduced to ``(count, sum of row
+    fingerprints)``. A fingerprint covers the key columns as well as
+    ``row_hash``, so rows of one bucket that swap their values, or a key that
+    changes while its values do not, still change the sum. Only disagreeing
+    buckets are split ``fanout`` ways on the next level, until they hold at most
+    ``min_rows`` rows or ``max_depth`` is reached.
+
+    Returns:
+        A predicate on ``key_hash`` selecting the disagreeing buckets, or None
+        when the differences are too widespread for bucketing to help.
+    """
+    fingerprint = adapter.build_bucket_hash_expr(key_cols + ["row_hash"])
+    parent: Optional[str] = None
+
+    for depth in range(max_depth):
+        m = fanout ** (depth + 1)
+        bucket = f"mod(mod(key_hash, {m}) + {m}, {m})"
+        where = f" where {parent}" if parent else ""
+
+        sides = []
+        for table in (base_h, head_h):
+            sides.append(
+                {
+                    b: (c, s)
+                    for b, c, s in adapter.rows(
+                        conn,
+                        f"""
+                        select {bucket}, count(*), sum(cast({fingerprint} as decimal(38, 0)))
+                        from {table}{where}
+                        group by 1
+                        """,
+                    )
+                }
+            )
+        base_b, head_b = sides
+
+        mismatched = sorted(b for b in base_b.keys() | head_b.keys() if base_b.get(b) != head_b.get(b))
+        if not mismatched:
+            return "1 = 0"
+        if depth == 0 and len(mismatched) > fanout // 2:
+            return None
+
+        parent = f"{bucket} in ({', '.join(str(b) for b in mismatched)})"
+        rows_left = max(
+            sum(base_b[b][0] for b in mismatched if b in base_b),
+            sum(head_b[b][0] for b in mismatched if b in head_b),
+        )
+        if rows_left <= min_rows:
+            break
+
+    return parent
 
 
 def run_diff(
@@ -33,6 +253,17 @@ def run_diff(
     col_stats: bool,
     target: Optional[str],
     verbose: bool = True,
+    approx_distinct: bool = True,
+    hash_algo: str = "fast",
+    bucket_diff: bool = False,
+    head_target: Optional[str] = None,
+    parallel_build: bool = True,
+    reuse_base: bool = False,
+    head_conn_info: Optional[WarehouseConnInfo] = None,
+    index_keys: bool = False,
+    work_mem: Optional[str] = None,
+    sample_fraction: float = 1.0,
+    cache_worktrees: bool = False,
 ) -> dict[str, Any]:
     """Run the full Option 2 diff flow and return a structured result dict.
     
@@ -54,10 +285,40 @@ def run_diff(
         col_stats: If True, compute column-level statistics.
         target: Optional dbt target name.
         verbose: If True, print progress messages.
+        approx_distinct: If True, use approximate distinct counts for column
+            profiles of tables with at least APPROX_DISTINCT_MIN_ROWS rows, where
+            the warehouse supports it.
+        hash_algo: Row hash used for change detection: "fast" (warehouse-native
+            64-bit hash) or "md5".
+        bucket_diff: If True, compare per-bucket checksums first and only join
+            rows from key buckets that disagree.
+        head_target: Optional dbt target for the HEAD build (defaults to target).
+        parallel_build: If True and target and head_target are both set and
+            differ, run both dbt builds concurrently.
+        reuse_base: If True, keep the BASE snapshot in a cache schema keyed by the
+            project content at base_ref and skip the BASE build when it is there.
+            The BASE_CACHE_MAX most recently used snapshots per model are kept.
+        head_conn_info: Connection info for head_target when it differs from
+            conn_info. A HEAD relation in another database is streamed into the
+            diff schema before comparing.
+        index_keys: If True, index the key columns of both hashed tables before
+            the diff join so the planner can merge-join them without sorting.
+        work_mem: Optional Postgres work_mem (e.g. "256MB") for the diff join,
+            so its hash tables stay in memory instead of spilling to disk.
+        sample_fraction: Fraction of keys (0 < m <= 1) the row-level diff reads,
+            picked by key hash so both sides keep the same keys. Added/removed/
+            changed counts are scaled back up to estimates for the full tables.
+        cache_worktrees: If True, keep the worktrees under the user cache dir,
+            keyed by commit SHA, and reuse them (dbt's target/ state included)
+            when a later run resolves a ref to the same commit. Concurrent runs
+            must not share a cache.
     
     Returns:
         A dict containing metadata, row counts, schema differences, column profiles,
         and row-level diff results (added/removed/changed counts and sample keys).
+        When the project is unchanged between the refs, meta["unchanged"] is set,
+        nothing is built or queried, and the row counts and column profiles are
+        empty.
     """
 
     repo_root = Path(
@@ -67,15 +328,9 @@ def run_diff(
 
     run_id = sanitize_ident(f"{model}_{base_ref}_{head_ref}")
     diff_schema = f"dbt_model_diff__{run_id}"
-    base_table = f"{sanitize_ident(model)}__base"
-    head_table = f"{sanitize_ident(model)}__head"
-
-    conn = adapter.connect(conn_info)
-    conn.autocommit = True
-
-    tmp_dir = Path(tempfile.mkdtemp(prefix="dbt-model-diff-"))
-    wt_base = tmp_dir / "base"
-    wt_head = tmp_dir / "head"
+    model_ident = sanitize_ident(model)
+    base_table = f"{model_ident}__base"
+    head_table = f"{model_ident}__head"
 
     result: dict[str, Any] = {
         "meta": {
@@ -86,6 +341,7 @@ def run_diff(
             "keys": key_cols,
             "diff_schema": diff_schema,
             "tables": {"base": base_table, "head": head_table},
+            "sample_fraction": 1.0,
         },
         "rowcounts": {},
         "schema_diff": {"only_in_base": [], "only_in_head": [], "common": []},
@@ -93,55 +349,207 @@ def run_diff(
         "row_diff": None,
     }
 
+    # The same project content built with the same target runs the same SQL
+    # against the same sources, so there is nothing to build or compare. The
+    # relation in the warehouse may come from neither ref, so it is not counted.
+    if (not head_target or head_target == target) and _same_project(
+        repo_root, project_rel, base_ref, head_ref
+    ):
+        if verbose:
+            print(f"project unchanged between {base_ref} and {head_ref}; skipping builds")
+        result["meta"]["unchanged"] = True
+        if key_cols:
+            result["row_diff"] = {"added": 0, "removed": 0, "changed": 0, "sample_keys": []}
+        return result
+
+    conns = ExitStack()
+    conn = conns.enter_context(get_conn(adapter, conn_info))
+
+    tmp_dir: Optional[Path] = None
+    if cache_worktrees:
+        base_sha, head_sha = run(
+            ["git", "-C", str(repo_root), "rev-parse", f"{base_ref}^{{commit}}", f"{head_ref}^{{commit}}"]
+        ).split()
+        wt_cache = _worktree_cache_dir(repo_root)
+        wt_base = wt_cache / base_sha
+        # Equal commits only get this far with distinct targets, whose builds
+        # may run concurrently, so HEAD then needs a checkout of its own.
+        wt_head = wt_cache / (head_sha if head_sha != base_sha else f"{head_sha}-head")
+        wt_refs = ((wt_base, base_sha), (wt_head, head_sha))
+    else:
+        tmp_dir = Path(tempfile.mkdtemp(prefix="dbt-model-diff-"))
+        wt_base = tmp_dir / "base"
+        wt_head = tmp_dir / "head"
+        wt_refs = ((wt_base, base_ref), (wt_head, head_ref))
+
     try:
         adapter.ensure_schema(conn, diff_schema)
 
-        # Create worktrees
-        run(["git", "-C", str(repo_root), "worktree", "add", "--force", str(wt_base), base_ref])
-        run(["git", "-C", str(repo_root), "worktree", "add", "--force", str(wt_head), head_ref])
+        # Create worktrees. Registering a worktree scans the other entries under
+        # .git/worktrees, so registration is serial (and cheap with --no-checkout);
+        # the expensive file checkout then runs for both worktrees concurrently,
+        # each splitting its file writes over half the CPUs.
+        # A cached worktree still at its commit is reused; the checkout below
+        # then only restores tracked files a previous run may have touched.
+        for wt, ref in wt_refs:
+            if cache_worktrees and _worktree_at(wt, ref):
+                os.utime(wt)
+                if verbose:
+                    print(f"reusing worktree {wt}")
+                continue
+            if cache_worktrees:
+                shutil.rmtree(wt, ignore_errors=True)
+            run(["git", "-C", str(repo_root), "worktree", "add", "--force", "--no-checkout", str(wt), ref])
+        workers = max(1, (os.cpu_count() or 2) // 2)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            checkouts = [
+                pool.submit(_checkout_worktree, wt, project_rel, workers)
+                for wt in (wt_base, wt_head)
+            ]
+            for fut in checkouts:
+                fut.result()
+
+        # HEAD built into another database/cluster cannot be read (or CTAS-copied)
+        # over the BASE connection.
+        remote_head = head_conn_info is not None and (
+            (head_conn_info.host, head_conn_info.port, head_conn_info.dbname)
+            != (conn_info.host, conn_info.port, conn_info.dbname)
+        )
 
         wt_base_project = wt_base / project_rel
         wt_head_project = wt_head / project_rel
+        _seed_partial_parse(project_dir, wt_base_project)
+
+        base_cached = False
+        if reuse_base:
+            cache_table = _base_cache_table(wt_base, project_rel, model, profiles_dir, target)
+            adapter.ensure_schema(conn, BASE_CACHE_SCHEMA)
+            if adapter.relation_exists(conn, BASE_CACHE_SCHEMA, cache_table):
+                if verbose:
+                    print(f"reusing base snapshot {BASE_CACHE_SCHEMA}.{cache_table}")
+                adapter.ctas_copy(conn, BASE_CACHE_SCHEMA, cache_table, diff_schema, base_table)
+                adapter.touch_cache_table(conn, BASE_CACHE_SCHEMA, cache_table, model, BASE_CACHE_MAX)
+                base_cached = True
+
+        # Only explicitly distinct targets qualify: a None target means the
+        # profile default, which may well be the same target as head_target.
+        parallel = (
+            parallel_build and not base_cached
+            and bool(target) and bool(head_target) and head_target != target
+        )
+        head_target = head_target or target
+
+        # Populating the BASE cache is a warehouse-side copy that nothing reads
+        # until the next run, so it runs on its own pooled connection while HEAD
+        # is built and snapshotted.
+        copy_pool = conns.enter_context(ThreadPoolExecutor(max_workers=1))
+        cache_fut = None
+
+        def populate_cache():
+            with get_conn(adapter, conn_info) as c:
+                adapter.ctas_copy(c, diff_schema, base_table, BASE_CACHE_SCHEMA, cache_table)
+                # Each new project tree at --base adds a snapshot; evict the oldest.
+                adapter.touch_cache_table(c, BASE_CACHE_SCHEMA, cache_table, model, BASE_CACHE_MAX)
+
+        if parallel:
+            # Distinct targets build into distinct relations, so the two
+            # build -> copy pipelines are independent and run side by side, each
+            # copying on its own pooled connection (psycopg2 connections are not
+            # shared across threads).
+            def build_and_copy(wt_project, side_target, table, in_process=False):
+                dbt_build(wt_project, profiles_dir, model, side_target, in_process=in_process)
+                relname = get_model_node(wt_project, model).get("relation_name")
+                if table is not None:
+                    src_schema, src_ident = parse_relation_name_pg(relname)
+                    with get_conn(adapter, conn_info) as c:
+                        adapter.ctas_copy(c, src_schema, src_ident, diff_schema, table)
+                return relname
+
+            _seed_partial_parse(project_dir, wt_head_project)
+            if verbose:
+                print(f"dbt build (base: {base_ref}, head: {head_ref}) in parallel")
+            # HEAD runs as a dbt subprocess in a worker thread while BASE runs
+            # in-process on this thread: one in-process invocation at a time is
+            # safe, and dbt installs signal handlers, which needs the main thread.
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                head_fut = pool.submit(
+                    build_and_copy, wt_head_project, head_target,
+                    head_table if keep_schemas and not remote_head else None,
+                )
+                base_relname = build_and_copy(wt_base_project, target, base_table, in_process=True)
+                if reuse_base:
+                    cache_fut = copy_pool.submit(populate_cache)
+                head_relname = head_fut.result()
+            # A HEAD in another database may share the schema and table name.
+            if not remote_head and (
+                parse_relation_name_pg(base_relname) == parse_relation_name_pg(head_relname)
+            ):
+                raise RuntimeError(
+                    f"Targets '{target}' and '{head_target}' both build {model} into "
+                    f"{base_relname}; use targets with different schemas or --no-parallel-build."
+                )
+        else:
+            if not base_cached:
+                # BASE build + immediate copy
+                if verbose:
+                    print(f"dbt build (base: {base_ref})")
+                dbt_build(
+                    wt_base_project, profiles_dir, model, target, in_process=True, stream=verbose
+                )
+                base_relname = get_model_node(wt_base_project, model).get("relation_name")
+                base_src_schema, base_src_ident = parse_relation_name_pg(base_relname)
+                adapter.ctas_copy(conn, base_src_schema, base_src_ident, diff_schema, base_table)
+                if reuse_base:
+                    cache_fut = copy_pool.submit(populate_cache)
+
+            # HEAD starts from the state BASE's build just parsed, so only the
+            # files the two refs disagree on are reparsed.
+            _seed_partial_parse(project_dir if base_cached else wt_base_project, wt_head_project)
+            if verbose:
+                print(f"dbt build (head: {head_ref})")
+            dbt_build(
+                wt_head_project, profiles_dir, model, head_target, in_process=True, stream=verbose
+            )
+            head_relname = get_model_node(wt_head_project, model).get("relation_name")
 
-        # BASE build + immediate copy
-        if verbose:
-            print(f"dbt build (base: {base_ref})")
-        dbt_build(wt_base_project, profiles_dir, model, target)
-        base_node = get_model_node(wt_base_project, model)
-        base_relname = base_node.get("relation_name")
-        base_src_schema, base_src_ident = parse_relation_name_pg(base_relname)
-        adapter.ctas_copy(conn, base_src_schema, base_src_ident, diff_schema, base_table)
-
-        # HEAD build + immediate copy
-        if verbose:
-            print(f"dbt build (head: {head_ref})")
-        dbt_build(wt_head_project, profiles_dir, model, target)
-        head_node = get_model_node(wt_head_project, model)
-        head_relname = head_node.get("relation_name")
+        # Nothing is built after HEAD, so its relation is only snapshotted when
+        # the caller wants to keep the diff schema around.
         head_src_schema, head_src_ident = parse_relation_name_pg(head_relname)
-        adapter.ctas_copy(conn, head_src_schema, head_src_ident, diff_schema, head_table)
+        if remote_head:
+            with get_conn(adapter, head_conn_info) as src_conn:
+                adapter.ctas_copy_cross(
+                    src_conn, conn, head_src_schema, head_src_ident, diff_schema, head_table
+                )
+            head_schema, head_ident = diff_schema, head_table
+        elif keep_schemas:
+            if not parallel:
+                adapter.ctas_copy(conn, head_src_schema, head_src_ident, diff_schema, head_table)
+            head_schema, head_ident = diff_schema, head_table
+        else:
+            head_schema, head_ident = head_src_schema, head_src_ident
+            result["meta"]["tables"]["head"] = f"{head_src_schema}.{head_src_ident}"
+
+        if cache_fut is not None:
+            cache_fut.result()
 
         # Compare snapshots
         q = adapter.quote_ident
         base_rel = f"{q(diff_schema)}.{q(base_table)}"
-        head_rel = f"{q(diff_schema)}.{q(head_table)}"
-
-        predicate = f" where {where} " if where else ""
-        base_sub = f"(select * from {base_rel}{predicate})"
-        head_sub = f"(select * from {head_rel}{predicate})"
-
-        base_count = adapter.rowcount(conn, base_sub)
-        head_count = adapter.rowcount(conn, head_sub)
-        result["rowcounts"] = {"base": base_count, "head": head_count}
+        head_rel = f"{q(head_schema)}.{q(head_ident)}"
 
-        head_cols = adapter.list_columns(conn, diff_schema, head_table)
-        base_cols = adapter.list_columns(conn, diff_schema, base_table)
-        head_set = set(head_cols)
-        base_set = set(base_cols)
+        # --where is applied directly in each scan's WHERE clause (no derived-table
+        # wrapper), so the predicate is visible to the planner at scan time.
+        predicate = f" where {where}" if where else ""
 
-        common_cols = [c for c in head_cols if c in base_set]
-        only_in_head = [c for c in head_cols if c not in base_set]
-        only_in_base = [c for c in base_cols if c not in head_set]
+        columns = adapter.list_columns_multi(
+            conn, [(head_schema, head_ident), (diff_schema, base_table)]
+        )
+        head_cols = columns[(head_schema, head_ident)]
+        base_cols = columns[(diff_schema, base_table)]
+        # Both column maps are dicts, so membership tests are already hashed.
+        common_cols = [c for c in head_cols if c in base_cols]
+        only_in_head = [c for c in head_cols if c not in base_cols]
+        only_in_base = [c for c in base_cols if c not in head_cols]
 
         result["schema_diff"] = {
             "only_in_base": only_in_base,
@@ -149,27 +557,52 @@ def run_diff(
             "common": common_cols,
         }
 
-        if col_stats and common_cols:
-            base_prof = adapter.column_profile(conn, diff_schema, base_table, common_cols)
-            head_prof = adapter.column_profile(conn, diff_schema, head_table, common_cols)
+        profile_cols = common_cols if col_stats else []
+
+        def side_stats(c, rel: str, schema: str, table: str):
+            if not profile_cols:
+                return adapter.rowcount(c, rel, where), {}
+            # The profile returns the exact row count from its own scan. The
+            # approximate-distinct switch only needs the table's size up front,
+            # which a catalog/planner estimate gives without another scan.
+            approx = False
+            if approx_distinct:
+                size = adapter.estimated_rowcount(c, schema, table)
+                if size is None:
+                    size = adapter.rowcount(c, rel, where)
+                approx = size >= APPROX_DISTINCT_MIN_ROWS
+            return adapter.column_profile(
+                c, schema, table, profile_cols, approx_distinct=approx, where=where
+            )
+
+        # BASE and HEAD stats are independent scans; run them side by side on
+        # their own connections (psycopg2 connections are not shared across threads).
+        conn_h = conns.enter_context(get_conn(adapter, conn_info))
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            base_fut = pool.submit(side_stats, conn, base_rel, diff_schema, base_table)
+            head_fut = pool.submit(side_stats, conn_h, head_rel, head_schema, head_ident)
+            base_count, base_prof = base_fut.result()
+            head_count, head_prof = head_fut.result()
+        result["rowcounts"] = {"base": base_count, "head": head_count}
 
+        if profile_cols:
             col_out: dict[str, Any] = {}
             for col in common_cols:
-                b = base_prof.get(col, {"nulls": 0, "distinct": 0})
-                h = head_prof.get(col, {"nulls": 0, "distinct": 0})
+                b = base_prof.get(col, _EMPTY_PROFILE)
+                h = head_prof.get(col, _EMPTY_PROFILE)
 
                 col_out[col] = {
                     "base": {
-                        "nulls": int(b["nulls"]),
-                        "distinct": int(b["distinct"]),
-                        "null_pct": pct(int(b["nulls"]), base_count),
-                        "uniq_pct": pct(int(b["distinct"]), base_count),
+                        "nulls": b["nulls"],
+                        "distinct": b["distinct"],
+                        "null_pct": pct(b["nulls"], base_count),
+                        "uniq_pct": pct(b["distinct"], base_count),
                     },
                     "head": {
-                        "nulls": int(h["nulls"]),
-                        "distinct": int(h["distinct"]),
-                        "null_pct": pct(int(h["nulls"]), head_count),
-                        "uniq_pct": pct(int(h["distinct"]), head_count),
+                        "nulls": h["nulls"],
+                        "distinct": h["distinct"],
+                        "null_pct": pct(h["nulls"], head_count),
+                        "uniq_pct": pct(h["distinct"], head_count),
                     },
                 }
             result["column_profile"] = col_out
@@ -178,95 +611,233 @@ def run_diff(
             return result
 
         # Row-level diff
-        non_key_cols = [c for c in common_cols if c not in set(key_cols)]
-        base_hash = adapter.build_row_hash_expr(non_key_cols)
-        head_hash = adapter.build_row_hash_expr(non_key_cols)
-
-        join_on = " and ".join([f"b.{q(k)} = h.{q(k)}" for k in key_cols])
-        using_clause = ", ".join([q(k) for k in key_cols])
-        first_key = key_cols[0]
-
-        added = adapter.scalar(
-            conn,
-            f"""
-            select count(*)
-            from {head_sub} h
-            left join {base_sub} b on {join_on}
-            where b.{q(first_key)} is null
-            """,
-        )
-        removed = adapter.scalar(
-            conn,
-            f"""
-            select count(*)
-            from {base_sub} b
-            left join {head_sub} h on {join_on}
-            where h.{q(first_key)} is null
-            """,
-        )
-        changed = adapter.scalar(
-            conn,
-            f"""
-            with base_h as (
-              select {', '.join([q(k) for k in key_cols])},
-                     {base_hash} as row_hash
-              from {base_sub} b
-            ),
-            head_h as (
-              select {', '.join([q(k) for k in key_cols])},
-                     {head_hash} as row_hash
-              from {head_sub} h
-            )
-            select count(*)
-            from base_h b
-            join head_h h using ({using_clause})
-            where b.row_hash <> h.row_hash
-            """,
+        key_set = frozenset(key_cols)
+        non_key_cols = [c for c in common_cols if c not in key_set]
+
+        # With a single non-key column of the same comparable type on both sides,
+        # hashing it only adds per-row CPU: carry the value itself and mark row
+        # presence with a constant, since the value may be null.
+        direct = (
+            len(non_key_cols) == 1
+            and base_cols[non_key_cols[0]] == head_cols[non_key_cols[0]]
+            and head_cols[non_key_cols[0]] in DIRECT_COMPARE_TYPES
         )
+        if direct:
+            row_hash = q(non_key_cols[0])
+            marker = ", true as present"
+            b_missing, h_missing = "b.present is null", "h.present is null"
+            differs = "b.row_hash is distinct from h.row_hash"
+        else:
+            row_hash = adapter.build_row_hash_expr(non_key_cols, algo=hash_algo)
+            marker = ""
+            # row_hash is never null, so a null hash marks the side where the key is missing.
+            b_missing, h_missing = "b.row_hash is null", "h.row_hash is null"
+            differs = "b.row_hash <> h.row_hash"
 
-        sample_keys: list[list[Any]] = []
-        if changed and sample > 0:
-            rows = adapter.rows(
-                conn,
+        join_on = " and ".join([f"b.{q(k)} = h.{q(k)}" for k in key_cols])
+        key_list = ", ".join([q(k) for k in key_cols])
+
+        # Both sides share one select list, so they cannot hash differently.
+        hashed_cols = key_list
+        if bucket_diff:
+            hashed_cols += f", {adapter.build_bucket_hash_expr(key_cols)} as key_hash"
+        hashed_select = f"select {hashed_cols}, {row_hash} as row_hash{marker}"
+
+        diff_predicate = predicate
+        slots = SAMPLE_SLOTS
+        if sample_fraction < 1:
+            # Keep the same hash slots of keys on both sides: a key is either in
+            # the sample on both sides or on neither, so the join stays exact for
+            # the keys it reads and only the totals are extrapolated.
+            slots = max(1, round(sample_fraction * SAMPLE_SLOTS))
+            key_hash = adapter.build_bucket_hash_expr(key_cols)
+            slot = f"mod(mod({key_hash}, {SAMPLE_SLOTS}) + {SAMPLE_SLOTS}, {SAMPLE_SLOTS})"
+            keep = f"{slot} < {slots}"
+            diff_predicate = f" where ({where}) and {keep}" if where else f" where {keep}"
+            result["meta"]["sample_fraction"] = slots / SAMPLE_SLOTS
+        base_sql = f"{hashed_select} from {base_rel} t{diff_predicate}"
+        head_sql = f"{hashed_select} from {head_rel} t{diff_predicate}"
+
+        # With equal rowcounts and profiles the sides may well be identical; check
+        # that with one order-independent checksum per side before joining.
+        short_circuit = base_count == head_count and (not profile_cols or base_prof == head_prof)
+
+        if short_circuit or bucket_diff or index_keys:
+            # The hashes are read more than once (or indexed), so hash each side
+            # exactly once, concurrently on the two connections, into a narrow
+            # (keys, row_hash) scratch table in the diff schema.
+            base_h = f"{q(diff_schema)}.{q(base_table + '_h')}"
+            head_h = f"{q(diff_schema)}.{q(head_table + '_h')}"
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                hashed = [
+                    pool.submit(
+                        adapter.create_scratch_table,
+                        c, diff_schema, table + "_h", sql, key_cols, index_keys=index_keys,
+                    )
+                    for c, table, sql in ((conn, base_table, base_sql), (conn_h, head_table, head_sql))
+                ]
+                for fut in hashed:
+                    fut.result()
+            base_from = base_h
+            head_from = head_h
+        else:
+            # Only the diff join reads the hashes: computing them inline saves
+            # writing and rereading both scratch tables.
+            base_from = f"({base_sql})"
+            head_from = f"({head_sql})"
+
+        if short_circuit:
+            # Equal checksums of (keys, row_hash) mean the same row set, so the
+            # diff join below can be skipped entirely.
+            fingerprint = adapter.build_bucket_hash_expr(key_cols + ["row_hash"])
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                sums = [
+                    pool.submit(
+                        adapter.scalar,
+                        c,
+                        f"select sum(cast({fingerprint} as decimal(38, 0))) from {rel} t",
+                    )
+                    for c, rel in ((conn, base_h), (conn_h, head_h))
+                ]
+                base_sum, head_sum = (fut.result() for fut in sums)
+            if base_sum == head_sum:
+                result["row_diff"] = {"added": 0, "removed": 0, "changed": 0, "sample_keys": []}
+                return result
+
+        if bucket_diff:
+            # Buckets with equal checksums are treated as unchanged and skipped.
+            buckets = _bucket_diff(adapter, conn, base_h, head_h, key_cols)
+            if buckets:
+                base_from = f"(select * from {base_h} where {buckets})"
+                head_from = f"(select * from {head_h} where {buckets})"
+
+        # One FULL OUTER JOIN pass classifies every key as added, removed or changed.
+        # Only differing keys are kept, so the counts and the sample both read this
+        # (usually small) table instead of joining the two sides a second time.
+        diff_t = f"{model_ident}__diff"
+        sample_sql = f"""
+            select {key_list}
+            from {q(diff_t)}
+            where diff_status = 'changed'
+            limit {int(sample)}
+            """
+
+        def diff_part(c, b_from: str, h_from: str) -> tuple[dict[str, int], list[tuple[Any, ...]]]:
+            adapter.create_temp_table(
+                c,
+                diff_t,
                 f"""
-                with base_h as (
-                  select {', '.join([q(k) for k in key_cols])},
-                         {base_hash} as row_hash
-                  from {base_sub} b
-                ),
-                head_h as (
-                  select {', '.join([q(k) for k in key_cols])},
-                         {head_hash} as row_hash
-                  from {head_sub} h
-                )
-                select {', '.join([f'b.{q(k)}' for k in key_cols])}
-                from base_h b
-                join head_h h using ({using_clause})
-                where b.row_hash <> h.row_hash
-                limit {int(sample)}
+                select
+                  case
+                    when {b_missing} then 'added'
+                    when {h_missing} then 'removed'
+                    else 'changed'
+                  end as diff_status,
+                  {', '.join([f'coalesce(b.{q(k)}, h.{q(k)}) as {q(k)}' for k in key_cols])}
+                from {b_from} b
+                full outer join {h_from} h on {join_on}
+                where {b_missing} or {h_missing} or {differs}
                 """,
+                key_cols,
+                work_mem=work_mem,
+            )
+            # At most three groups: a bounded fetch is a single round trip, where an
+            # unbounded one would go through a server-side cursor.
+            part_counts = dict(
+                adapter.rows(
+                    c, f"select diff_status, count(*) from {q(diff_t)} group by diff_status", limit=3
+                )
             )
-            sample_keys = [list(r) for r in rows]
+            part_keys: list[tuple[Any, ...]] = []
+            if part_counts.get("changed") and sample > 0:
+                # The sample query is LIMITed, so a bounded fetch reads it in one
+                # round trip whatever its size, and keys keep the driver's types.
+                # islice stops reading at `sample` rows whatever the adapter's
+                # iterator would still yield.
+                part_keys = list(islice(adapter.rows(c, sample_sql, limit=sample), sample))
+            # Temp tables live as long as their (pooled) connection: drop each
+            # one as soon as it is read instead of keeping every partition's.
+            adapter.drop_temp_table(c, diff_t)
+            return part_counts, part_keys
+
+        parts = 1
+        if adapter.join_partition_rows:
+            rows_in = max(base_count, head_count) * slots // SAMPLE_SLOTS
+            parts = min(MAX_JOIN_PARTITIONS, -(-rows_in // adapter.join_partition_rows))
+        if parts <= 1:
+            results = [diff_part(conn, base_from, head_from)]
+        else:
+            # Very large sides: route each side's rows into key-hash partitions in
+            # a single pass (both sides at once, on their own connections), then
+            # join the partitions pairwise, side by side on pooled connections.
+            # Each partition join is small enough for its hash table to stay in
+            # memory and reads only its own partitions.
+            key_hash = adapter.build_bucket_hash_expr(key_cols)
+            bucket = f"mod(mod({key_hash}, {parts}) + {parts}, {parts})"
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                split = [
+                    pool.submit(
+                        adapter.create_partitioned_scratch_table,
+                        c, diff_schema, table + "_p", f"select * from {src} t", bucket, parts,
+                    )
+                    for c, table, src in ((conn, base_table, base_from), (conn_h, head_table, head_from))
+                ]
+                base_parts, head_parts = (fut.result() for fut in split)
+            part_conns = [conn, conn_h][:parts] + [
+                conns.enter_context(get_conn(adapter, conn_info))
+                for _ in range(min(parts, MAX_CONNS) - 2)
+            ]
+
+            def run_parts(i: int):
+                c = part_conns[i]
+                return [
+                    diff_part(c, base_parts[p], head_parts[p])
+                    for p in range(i, parts, len(part_conns))
+                ]
+
+            with ThreadPoolExecutor(max_workers=len(part_conns)) as pool:
+                results = [
+                    r for batch in pool.map(run_parts, range(len(part_conns))) for r in batch
+                ]
+            if verbose:
+                print(f"row diff joined in {parts} key partitions")
+
+        counts: dict[str, int] = {}
+        sample_keys: list[tuple[Any, ...]] = []
+        for part_counts, part_keys in results:
+            for status, n in part_counts.items():
+                counts[status] = counts.get(status, 0) + n
+            sample_keys.extend(part_keys[: sample - len(sample_keys)])
+        added = round(counts.get("added", 0) * SAMPLE_SLOTS / slots)
+        removed = round(counts.get("removed", 0) * SAMPLE_SLOTS / slots)
+        changed = round(counts.get("changed", 0) * SAMPLE_SLOTS / slots)
 
         result["row_diff"] = {
-            "added": int(added),
-            "removed": int(removed),
-            "changed": int(changed),
+            "added": added,
+            "removed": removed,
+            "changed": changed,
             "sample_keys": sample_keys,
         }
         return result
 
     finally:
-        # Cleanup worktrees + temp
-        try:
-            run(["git", "-C", str(repo_root), "worktree", "remove", "--force", str(wt_base)])
-        except Exception:
-            pass
-        try:
-            run(["git", "-C", str(repo_root), "worktree", "remove", "--force", str(wt_head)])
-        except Exception:
-            pass
-        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if cache_worktrees:
+            try:
+                _prune_worktree_cache(repo_root, wt_cache, {wt_base, wt_head})
+            except Exception:
+                pass
+        else:
+            # Cleanup worktrees + temp. Deleting the checkouts is the slow part and
+            # touches only each worktree's own files, so both run concurrently; the
+            # unregistration (which scans .git/worktrees, like add) then stays serial.
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(lambda wt: shutil.rmtree(wt, ignore_errors=True), (wt_base, wt_head)))
+            for wt in (wt_base, wt_head):
+                try:
+                    run(["git", "-C", str(repo_root), "worktree", "remove", "--force", str(wt)])
+                except Exception:
+                    pass
+            shutil.rmtree(tmp_dir, ignore_errors=True)
 
         if not keep_schemas:
             try:
@@ -274,4 +845,4 @@ def run_diff(
             except Exception:
                 pass
 
-        conn.close()
+        conns.close()
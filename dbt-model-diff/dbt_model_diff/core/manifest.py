@@ -2,11 +2,40 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import re
 from pathlib import Path
 from typing import Tuple
 
+try:
+    import orjson
+except ImportError:  # optional speedup, see the `fast` extra
+    orjson = None
+
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+
+
+@functools.lru_cache(maxsize=8)
+def _load_models(manifest_path: str, mtime_ns: int) -> dict:
+    """Parse manifest.json into a name -> model node index.
+
+    Memoized on (path, mtime_ns), so a manifest is parsed once until dbt
+    rewrites it.
+    """
+    raw = Path(manifest_path).read_bytes()
+    manifest = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    nodes = manifest.get("nodes", {})
+    if not isinstance(nodes, dict):
+        raise ValueError("Invalid manifest.json: nodes missing")
+
+    models: dict = {}
+    for node in nodes.values():
+        if node.get("resource_type") == "model":
+            # First match wins, as with the former linear scan.
+            models.setdefault(node.get("name"), node)
+    return models
+
 
 def get_model_node(project_dir: Path, model: str) -> dict:
     """
@@ -37,24 +66,25 @@ def get_model_node(project_dir: Path, model: str) -> dict:
     """
     """Return the manifest node for a model by `name`."""
     manifest_path = project_dir / "target" / "manifest.json"
-    if not manifest_path.exists():
-        raise FileNotFoundError(f"manifest.json not found at: {manifest_path}")
+    try:
+        mtime_ns = manifest_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"manifest.json not found at: {manifest_path}") from None
 
-    manifest = json.loads(manifest_path.read_text())
-    nodes = manifest.get("nodes", {})
-    if not isinstance(nodes, dict):
-        raise ValueError("Invalid manifest.json: nodes missing")
-
-    for node in nodes.values():
-        if node.get("resource_type") == "model" and node.get("name") == model:
-            return node
+    node = _load_models(str(manifest_path), mtime_ns).get(model)
+    if node is not None:
+        return node
 
     raise ValueError(f"Model '{model}' not found in manifest.json")
 
 
+@functools.lru_cache(maxsize=128)
 def parse_relation_name_pg(relation_name: str) -> Tuple[str, str]:
-    """Parse Postgres/Redshift-style relation_name into (schema, identifier)."""
-    quoted = re.findall(r'"([^"]+)"', relation_name or "")
+    """Parse Postgres/Redshift-style relation_name into (schema, identifier).
+
+    Memoized: run_diff parses each side's relation name more than once.
+    """
+    quoted = _QUOTED_RE.findall(relation_name or "")
     if len(quoted) >= 2:
         return quoted[-2], quoted[-1]
 
@@ -3,10 +3,17 @@
 from __future__ import annotations
 
 import subprocess
+import sys
+from collections import deque
 from pathlib import Path
 
+# Lines of streamed output kept for the error message when a command fails.
+STREAM_TAIL_LINES = 200
 
-def run(cmd: list[str], cwd: Path | None = None) -> str:
+
+def run(
+    cmd: list[str], cwd: Path | None = None, stream: bool = False, keep_output: bool = True
+) -> str:
     """
     Execute a shell command and return its standard output.
     
@@ -17,19 +24,30 @@ def run(cmd: list[str], cwd: Path | None = None) -> str:
         cmd: List of command and arguments to execute (e.g., ['git', 'status']).
         cwd: Optional working directory path where the command should be executed.
              If None, uses the current working directory. Defaults to None.
+        stream: If True, echo the command's combined stdout/stderr to stderr line by
+                line as it runs instead of buffering it. Defaults to False.
+        keep_output: If False, keep only the last STREAM_TAIL_LINES lines of output
+                     (for the error message) instead of buffering all of it, for
+                     chatty commands whose output is not used. Defaults to True.
     
     Returns:
-        str: The standard output (stdout) of the executed command.
+        str: The standard output (stdout) of the executed command, or an empty
+             string when streaming or not keeping output.
     
     Raises:
         RuntimeError: If the command exits with a non-zero return code. The exception
-                      message includes the failed command, stdout, and stderr output.
+                      message includes the failed command, stdout, and stderr output
+                      (the last STREAM_TAIL_LINES lines of output when streaming or not
+                      keeping output).
     
     Example:
         >>> output = run(['git', 'log', '--oneline'], cwd=Path('/path/to/repo'))
         >>> print(output)
     """
     """Run a command and return stdout, raising RuntimeError on failure."""
+    if stream or not keep_output:
+        return _run_streaming(cmd, cwd, echo=stream)
+
     proc = subprocess.run(
         cmd,
         cwd=str(cwd) if cwd else None,
@@ -41,3 +59,29 @@ def run(cmd: list[str], cwd: Path | None = None) -> str:
             f"Command failed:\n  {' '.join(cmd)}\n\nSTDOUT:\n{proc.stdout}\n\nSTDERR:\n{proc.stderr}"
         )
     return proc.stdout
+
+
+def _run_streaming(cmd: list[str], cwd: Path | None, echo: bool = True) -> str:
+    """Run a command keeping only the tail of its output, echoing it to stderr if `echo`.
+
+    stderr is merged into stdout, so a single pipe is drained and neither can
+    fill up and block the child. Lines stay raw bytes and are only decoded to
+    be echoed or reported.
+    """
+    tail: deque[bytes] = deque(maxlen=STREAM_TAIL_LINES)
+    with subprocess.Popen(
+        cmd,
+        cwd=str(cwd) if cwd else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    ) as proc:
+        for line in proc.stdout:
+            if echo:
+                sys.stderr.write(line.decode(errors="replace"))
+            tail.append(line)
+    if proc.returncode != 0:
+        output = b"".join(tail).decode(errors="replace")
+        raise RuntimeError(
+            f"Command failed:\n  {' '.join(cmd)}\n\nOUTPUT (last {STREAM_TAIL_LINES} lines):\n{output}"
+        )
+    return ""
@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
+import os
 import re
+from pathlib import Path
+
+_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9_]+")
 
 
 def sanitize_ident(value: str, max_len: int = 60) -> str:
@@ -29,9 +33,15 @@ def sanitize_ident(value: str, max_len: int = 60) -> str:
         'table_name'
     """
     """Sanitize a string into a safe-ish identifier fragment."""
-    return re.sub(r"[^a-zA-Z0-9_]+", "_", value).lower()[:max_len]
+    return _SANITIZE_RE.sub("_", value).lower()[:max_len]
 
 
 def pct(n: int, d: int) -> float:
     """Compute percent with divide-by-zero safety."""
     return 0.0 if d == 0 else (n / d) * 100.0
+
+
+def user_cache_dir() -> Path:
+    """Return the per-user cache directory ($XDG_CACHE_HOME/dbt-model-diff)."""
+    root = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(root) / "dbt-model-diff"
@@ -3,7 +3,22 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+from typing import Any, TextIO
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the `fast` extra
+    orjson = None
+
+if orjson is not None:
+    # Datetimes go through default=str like on the stdlib path, so the output
+    # does not depend on whether orjson is installed.
+    _ORJSON_OPTIONS = (
+        orjson.OPT_INDENT_2
+        | orjson.OPT_SORT_KEYS
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+    )
 
 
 def render(result: dict[str, Any]) -> str:
@@ -22,7 +37,31 @@ def render(result: dict[str, Any]) -> str:
         formatted with 2-space indentation and alphabetically sorted keys.
     
     Note:
-        Non-serializable objects are converted to strings using str().
+        Non-serializable objects are converted to strings using str(). When
+        orjson is installed it is used for serialization (same layout, but
+        non-ASCII text is emitted as UTF-8 rather than \\u escapes).
     """
-    """Render a diff result as pretty JSON."""
+    if orjson is not None:
+        return orjson.dumps(result, default=str, option=_ORJSON_OPTIONS).decode()
     return json.dumps(result, indent=2, sort_keys=True, default=str)
+
+
+def write(result: dict[str, Any], out: TextIO) -> None:
+    """Write `result` to `out` as pretty JSON followed by a newline.
+
+    Same layout as `render`, but without building an intermediate str: orjson's
+    bytes go straight to the underlying binary buffer, and the stdlib encoder
+    writes chunk by chunk.
+    """
+    if orjson is not None and hasattr(out, "buffer"):
+        out.flush()
+        out.buffer.write(
+            orjson.dumps(result, default=str, option=_ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        )
+        out.buffer.flush()
+        return
+    if orjson is not None:
+        out.write(render(result) + "\n")
+        return
+    json.dump(result, out, indent=2, sort_keys=True, default=str)
+    out.write("\n")
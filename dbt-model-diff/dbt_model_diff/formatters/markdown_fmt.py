@@ -2,14 +2,14 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterable
 
 
-def _md_table(rows: list[list[str]]) -> str:
-    header = "| " + " | ".join(rows[0]) + " |"
-    sep = "|" + "|".join(["---"] * len(rows[0])) + "|"
-    body = "\n".join(["| " + " | ".join(r) + " |" for r in rows[1:]])
-    return "\n".join([header, sep, body])
+def _md_table(lines: list[str], header: list[str], rows: Iterable[Iterable[str]]) -> None:
+    """Append a Markdown table to `lines`, one entry per table line."""
+    lines.append("| " + " | ".join(header) + " |")
+    lines.append("|" + "|".join(["---"] * len(header)) + "|")
+    lines.extend("| " + " | ".join(r) + " |" for r in rows)
 
 
 def render(result: dict[str, Any]) -> str:
@@ -28,6 +28,10 @@ def render(result: dict[str, Any]) -> str:
                 - head (str): Head version identifier
                 - mode (str): Comparison mode
                 - keys (list): List of key columns used for comparison
+                - sample_fraction (float): Fraction of keys the row-level diff read
+                - unchanged (bool, optional): Set when the project was identical at
+                  base and head and the builds were skipped; rowcounts and
+                  column_profile are then empty
             - rowcounts (dict): Row count statistics
                 - base (int): Number of rows in base version
                 - head (int): Number of rows in head version
@@ -42,7 +46,7 @@ def render(result: dict[str, Any]) -> str:
                 - added (int): Number of rows added
                 - removed (int): Number of rows removed
                 - changed (int): Number of rows changed
-                - sample_keys (list): Sample of changed row keys
+                - sample_keys (list): Sample of changed row keys, one tuple of key values per row
     
     Returns:
         str: Formatted Markdown string containing the complete diff report with sections
@@ -60,10 +64,12 @@ def render(result: dict[str, Any]) -> str:
     lines.append(f"## dbt-model-diff: `{model}`")
     lines.append(f"**Base:** `{base}`  |  **Head:** `{head}`")
     lines.append(f"**Mode:** `{mode}`" + (f"  |  **Keys:** `{', '.join(keys)}`" if keys else ""))
+    if meta.get("unchanged"):
+        lines.append("_Project unchanged between base and head; builds skipped._")
     lines.append("")
 
     rc = result.get("rowcounts", {})
-    lines.append(_md_table([["Metric", "Value"], ["Base rowcount", str(rc.get("base", "-"))], ["Head rowcount", str(rc.get("head", "-"))]]))
+    _md_table(lines, ["Metric", "Value"], [["Base rowcount", str(rc.get("base", "-"))], ["Head rowcount", str(rc.get("head", "-"))]])
     lines.append("")
 
     sd = result.get("schema_diff", {})
@@ -81,7 +87,8 @@ def render(result: dict[str, Any]) -> str:
     prof = result.get("column_profile") or {}
     if prof:
         lines.append("### Column profile (common columns)")
-        rows = [["Column", "Base null %", "Head null %", "Base distinct", "Head distinct", "Base uniq %", "Head uniq %"]]
+        header = ["Column", "Base null %", "Head null %", "Base distinct", "Head distinct", "Base uniq %", "Head uniq %"]
+        rows = []
         for col, v in prof.items():
             b = v.get("base", {})
             h = v.get("head", {})
@@ -96,12 +103,15 @@ def render(result: dict[str, Any]) -> str:
                     f"{h.get('uniq_pct', 0.0):.1f}",
                 ]
             )
-        lines.append(_md_table(rows))
+        _md_table(lines, header, rows)
         lines.append("")
 
     rd = result.get("row_diff")
     if rd:
         lines.append("### Row-level diff")
+        fraction = meta.get("sample_fraction", 1.0)
+        if fraction < 1:
+            lines.append(f"_Estimated from {fraction * 100:g}% of keys._")
         lines.append(f"- Added: **{rd.get('added', 0)}**")
         lines.append(f"- Removed: **{rd.get('removed', 0)}**")
         lines.append(f"- Changed: **{rd.get('changed', 0)}**")
@@ -111,9 +121,11 @@ def render(result: dict[str, Any]) -> str:
 
             keys = meta.get("keys") or []
             hdr = keys if keys else ["key"]
-            rows = [hdr] + [[str(x) for x in row] for row in sample]
             lines.append("#### Sample changed keys")
-            lines.append(_md_table(rows))
+            # Rows are formatted straight into `lines`, with no per-row list copies.
+            _md_table(lines, hdr, (map(str, row) for row in sample))
         lines.append("")
 
-    return "\n".join(lines).strip()
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import csv
 from typing import Any
 
 from rich.console import Console
@@ -10,6 +11,10 @@ from rich.table import Table
 
 console = Console()
 
+# Larger samples are written as plain CSV: a rich Table measures every cell
+# before drawing anything, which is slow and memory-hungry at that size.
+MAX_SAMPLE_TABLE_ROWS = 10_000
+
 
 def render(result: dict[str, Any]) -> None:
     """
@@ -30,6 +35,10 @@ def render(result: dict[str, Any]) -> None:
                 - keys (list): Primary key columns
                 - diff_schema (str): Schema used for diff
                 - tables (dict): Table names for base and head
+                - sample_fraction (float): Fraction of keys the row-level diff read
+                - unchanged (bool, optional): Set when the project was identical at
+                  base and head and the builds were skipped; rowcounts and
+                  column_profile are then empty
             - rowcounts (dict): Row count metrics with 'base' and 'head' counts
             - schema_diff (dict): Schema differences containing:
                 - only_in_head (list): Columns present only in head
@@ -40,7 +49,7 @@ def render(result: dict[str, Any]) -> None:
                 - added (int): Number of added rows
                 - removed (int): Number of removed rows
                 - changed (int): Number of changed rows
-                - sample_keys (list): Sample of changed row keys
+                - sample_keys (list): Sample of changed row keys, one tuple of key values per row
     
     Returns:
         None
@@ -78,13 +87,15 @@ def render(result: dict[str, Any]) -> None:
             title="dbt-model-diff",
         )
     )
+    if meta.get("unchanged"):
+        console.print("[green]Project unchanged between base and head; builds skipped.[/green]")
 
     rc = result.get("rowcounts", {})
     summary = Table(title="Summary")
     summary.add_column("Metric")
     summary.add_column("Value", justify="right")
-    summary.add_row("Base rowcount", str(rc.get("base", 0)))
-    summary.add_row("Head rowcount", str(rc.get("head", 0)))
+    summary.add_row("Base rowcount", str(rc.get("base", "-")))
+    summary.add_row("Head rowcount", str(rc.get("head", "-")))
     console.print(summary)
 
     sd = result.get("schema_diff", {})
@@ -122,7 +133,11 @@ def render(result: dict[str, Any]) -> None:
 
     rd = result.get("row_diff")
     if rd:
-        diff = Table(title="Row-level diff")
+        fraction = meta.get("sample_fraction", 1.0)
+        title = "Row-level diff"
+        if fraction < 1:
+            title += f" (estimated from {fraction * 100:g}% of keys)"
+        diff = Table(title=title)
         diff.add_column("Metric")
         diff.add_column("Value", justify="right")
         diff.add_row("Added rows", str(rd.get("added", 0)))
@@ -131,7 +146,13 @@ def render(result: dict[str, Any]) -> None:
         console.print(diff)
 
         sample = rd.get("sample_keys") or []
-        if sample:
+        if len(sample) > MAX_SAMPLE_TABLE_ROWS:
+            console.print(f"[bold]Sample changed keys[/bold] (limit {len(sample)}, CSV)")
+            console.file.flush()
+            writer = csv.writer(console.file, lineterminator="\n")
+            writer.writerow(keys)
+            writer.writerows(sample)
+        elif sample:
             samp = Table(title=f"Sample changed keys (limit {len(sample)})")
             for k in keys:
                 samp.add_column(k)
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--keep-pg",
+        action="store_true",
+        default=False,
+        help="Leave the e2e Postgres container running and reuse it next time "
+        "(or set DBT_MODEL_DIFF_KEEP_PG=1)",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    # Keep tmp_path (the e2e git repo, and the worktrees dbt builds in) in RAM
+    # when a tmpfs is available. Only the temp root moves: pytest still makes a
+    # numbered base dir per session under it (and prunes old ones), so
+    # concurrent sessions never share one. An explicit --basetemp or
+    # PYTEST_DEBUG_TEMPROOT wins.
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        os.environ.setdefault("PYTEST_DEBUG_TEMPROOT", str(shm))
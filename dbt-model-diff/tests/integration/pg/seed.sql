@@ -0,0 +1,12 @@
+create schema if not exists raw;
+
+create table raw.customers (
+  id integer primary key,
+  name varchar(50)
+);
+
+insert into raw.customers (id, name) values
+  (1, 'Alice'),
+  (2, 'Bob'),
+  (3, 'Chandra'),
+  (4, 'Deepak');
@@ -2,16 +2,32 @@ from __future__ import annotations
 
 import json
 import os
+import selectors
 import shutil
 import socket
 import subprocess
+import tempfile
 import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
+from typer.testing import CliRunner
+
+from dbt_model_diff.adapters.postgres import PostgresAdapter
+from dbt_model_diff.cli import app
+
+try:
+    import orjson
+except ImportError:  # optional speedup, see the `fast` extra
+    orjson = None
 
 
 PG_CONTAINER = "dbt_model_diff_test_pg"
+# postgres:15 with raw.customers seeded at initdb time (see pg/Dockerfile).
+PG_IMAGE = "dbt_model_diff_test_pg:seeded"
+PG_IMAGE_DIR = Path(__file__).parent / "pg"
 PG_PORT = 55432
 PG_USER = "postgres"
 PG_PASSWORD = "postgres"
@@ -28,36 +44,110 @@ def _port_is_free(port: int) -> bool:
         return s.connect_ex(("127.0.0.1", port)) != 0
 
 
-def _run(cmd: list[str], cwd: Path | None = None, env: dict | None = None) -> str:
-    p = subprocess.run(
+# stderr kept for a failing command's error message.
+_STDERR_TAIL_BYTES = 64 * 1024
+
+
+def _run(
+    cmd: list[str], cwd: Path | None = None, env: dict | None = None, input: bytes | None = None
+) -> bytes:
+    """Run `cmd` and return its stdout as bytes.
+
+    Both pipes are drained with a selector while the command runs; only the
+    last _STDERR_TAIL_BYTES of stderr (where dbt logs) are kept, so chatty
+    output is never buffered in full or decoded unless the command fails.
+    `input` is written to stdin up front, so it must fit in a pipe buffer.
+    """
+    p = subprocess.Popen(
         cmd,
         cwd=str(cwd) if cwd else None,
         env=env,
-        capture_output=True,
-        text=True,
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
     )
-    if p.returncode != 0:
+    if input is not None:
+        with p.stdin:
+            p.stdin.write(input)
+    out = bytearray()
+    err = bytearray()
+    with selectors.DefaultSelector() as sel:
+        sel.register(p.stdout, selectors.EVENT_READ, out)
+        sel.register(p.stderr, selectors.EVENT_READ, err)
+        while sel.get_map():
+            for key, _ in sel.select():
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    sel.unregister(key.fileobj)
+                    continue
+                key.data.extend(chunk)
+                if len(err) > 2 * _STDERR_TAIL_BYTES:
+                    del err[:-_STDERR_TAIL_BYTES]
+    p.stdout.close()
+    p.stderr.close()
+    if p.wait() != 0:
         raise RuntimeError(
-            f"Command failed:\n  {' '.join(cmd)}\n\nSTDOUT:\n{p.stdout}\n\nSTDERR:\n{p.stderr}"
+            f"Command failed:\n  {' '.join(cmd)}\n\n"
+            f"STDOUT:\n{out.decode(errors='replace')}\n\n"
+            f"STDERR:\n{err[-_STDERR_TAIL_BYTES:].decode(errors='replace')}"
         )
-    return p.stdout
+    return bytes(out)
+
+
+def _load_json_output(out: bytes):
+    """Parse the JSON document the CLI printed last.
+
+    The pretty-printed document opens with an unindented `{` line, so anything
+    printed before it (stray log lines) is skipped.
+    """
+    start = out.rfind(b"\n{\n") + 1
+    if orjson is not None:
+        # orjson parses straight from the buffer, without a slice copy.
+        return orjson.loads(memoryview(out)[start:])
+    return json.loads(out[start:])
+
+
+def _docker_rm(name: str) -> None:
+    subprocess.run(["docker", "rm", "-f", name], capture_output=True, text=True)
 
 
-def _try_run(cmd: list[str], cwd: Path | None = None, env: dict | None = None) -> tuple[bool, str]:
+def _container_info() -> tuple[str, str] | None:
+    """Return (state, image id) of the test container, or None if there is none."""
     p = subprocess.run(
-        cmd,
-        cwd=str(cwd) if cwd else None,
-        env=env,
+        ["docker", "inspect", "-f", "{{.State.Status}} {{.Image}}", PG_CONTAINER],
         capture_output=True,
         text=True,
     )
     if p.returncode != 0:
-        return False, (p.stdout + "\n" + p.stderr)
-    return True, p.stdout
-
-
-def _docker_rm(name: str) -> None:
-    subprocess.run(["docker", "rm", "-f", name], capture_output=True, text=True)
+        return None
+    state, image = p.stdout.split()
+    return state, image
+
+
+def _build_image() -> None:
+    # Docker's layer cache makes this a no-op once the image is built.
+    _run(["docker", "build", "-q", "-t", PG_IMAGE, str(PG_IMAGE_DIR)])
+
+
+# The container is thrown away after the session, so durability is pure cost:
+# no fsync during initdb or afterwards, minimal WAL (which needs
+# max_wal_senders=0), and no autovacuum on a handful of tiny tables.
+PG_SERVER_ARGS = [
+    "-c",
+    "fsync=off",
+    "-c",
+    "synchronous_commit=off",
+    "-c",
+    "full_page_writes=off",
+    "-c",
+    "wal_level=minimal",
+    "-c",
+    "max_wal_senders=0",
+    "-c",
+    "autovacuum=off",
+    "-c",
+    "shared_buffers=64MB",
+]
 
 
 def _start_postgres() -> None:
@@ -69,77 +159,126 @@ def _start_postgres() -> None:
             "-d",
             "--name",
             PG_CONTAINER,
+            # Data directory in RAM.
+            "--tmpfs",
+            "/var/lib/postgresql/data:rw",
+            "--shm-size=256m",
             "-e",
             f"POSTGRES_PASSWORD={PG_PASSWORD}",
+            "-e",
+            "POSTGRES_INITDB_ARGS=--nosync",
             "-p",
             f"{PG_PORT}:5432",
-            "postgres:15",
+            PG_IMAGE,
+            "postgres",
+            *PG_SERVER_ARGS,
         ]
     )
 
 
 def _wait_for_postgres(timeout_s: int = 30) -> None:
-    deadline = time.time() + timeout_s
-    while time.time() < deadline:
+    """Block until the container's final Postgres server accepts connections.
+
+    Probes over TCP: while running initdb scripts the entrypoint starts a
+    temporary server that only listens on the Unix socket, so it never counts.
+    """
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
         p = subprocess.run(
-            ["docker", "exec", PG_CONTAINER, "pg_isready", "-U", PG_USER],
+            ["docker", "exec", PG_CONTAINER, "pg_isready", "-h", "127.0.0.1", "-U", PG_USER],
             capture_output=True,
-            text=True,
         )
         if p.returncode == 0:
             return
-        time.sleep(0.5)
+        time.sleep(0.2)
     raise RuntimeError("Postgres did not become ready in time")
 
 
-def _psql(sql: str) -> None:
-    _run(
-        [
-            "docker",
-            "exec",
-            "-e",
-            f"PGPASSWORD={PG_PASSWORD}",
-            PG_CONTAINER,
-            "psql",
-            "-U",
-            PG_USER,
-            "-d",
-            PG_DB,
-            "-v",
-            "ON_ERROR_STOP=1",
-            "-c",
-            sql,
-        ]
-    )
-
-
-def _init_source_data() -> None:
-    _psql("create schema if not exists raw;")
-    _psql("drop table if exists raw.customers;")
-    _psql(
-        """
-        create table raw.customers (
-          id integer primary key,
-          name varchar(50)
-        );
-        """
-    )
-    _psql(
-        """
-        insert into raw.customers (id, name) values
-          (1, 'Alice'),
-          (2, 'Bob'),
-          (3, 'Chandra'),
-          (4, 'Deepak');
-        """
-    )
+class _PsqlSession:
+    """A long-lived psql in the container, fed statements over stdin.
 
+    Every `run` is followed by an `\\echo` of a unique marker and returns once
+    psql prints it, so statements after the first pay no `docker exec` start-up.
+    With ON_ERROR_STOP=1, psql exits on the first failing statement.
+    """
 
-def _write_fixture_project(repo: Path) -> None:
-    (repo / "models").mkdir(parents=True, exist_ok=True)
-
-    (repo / "dbt_project.yml").write_text(
-        """name: "mini_project"
+    def __init__(self) -> None:
+        self._proc: subprocess.Popen | None = None
+        self._stderr = None
+
+    def open(self) -> "_PsqlSession":
+        # stderr (NOTICEs, errors) goes to a file so it can never fill a pipe.
+        self._stderr = tempfile.TemporaryFile(mode="w+")
+        self._proc = subprocess.Popen(
+            [
+                "docker",
+                "exec",
+                "-i",
+                "-e",
+                f"PGPASSWORD={PG_PASSWORD}",
+                PG_CONTAINER,
+                "psql",
+                "-X",
+                "-q",
+                "-U",
+                PG_USER,
+                "-d",
+                PG_DB,
+                "-v",
+                "ON_ERROR_STOP=1",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+            text=True,
+        )
+        return self
+
+    def close(self) -> None:
+        proc = self._proc
+        if proc is not None:
+            proc.stdin.close()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            proc.stdout.close()
+        if self._stderr is not None:
+            self._stderr.close()
+
+    def __enter__(self) -> "_PsqlSession":
+        return self.open()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def run(self, sql: str) -> str:
+        """Run `sql` and return what psql printed for it."""
+        proc = self._proc
+        marker = f"__DONE_{uuid.uuid4().hex}__"
+        # A trailing `;` makes psql send the buffer before it sees the \echo.
+        sql = sql.rstrip()
+        if not sql.endswith(";"):
+            sql += ";"
+        try:
+            proc.stdin.write(f"{sql}\n\\echo {marker}\n")
+            proc.stdin.flush()
+        except BrokenPipeError:
+            pass  # psql already exited; reported below
+
+        out: list[str] = []
+        for line in proc.stdout:
+            if line.rstrip("\n") == marker:
+                return "".join(out)
+            out.append(line)
+
+        proc.wait()
+        self._stderr.seek(0)
+        raise RuntimeError(f"psql exited with {proc.returncode}:\n{sql}\n\n{self._stderr.read()}")
+
+
+# Fixture project files, encoded once at import.
+_DBT_PROJECT_YML = b"""name: "mini_project"
 version: "1.0.0"
 profile: "mini_project"
 config-version: 2
@@ -153,36 +292,35 @@ macro-paths: ["macros"]
 models:
   mini_project:
     +materialized: table
-""",
-        encoding="utf-8",
-    )
+"""
 
-    (repo / "models" / "schema.yml").write_text(
-        """version: 2
+_SCHEMA_YML = b"""version: 2
 
 sources:
   - name: raw
     schema: raw
     tables:
       - name: customers
-""",
-        encoding="utf-8",
-    )
+"""
 
-    # Base version: filters out id=4
-    (repo / "models" / "dim_customers.sql").write_text(
-        """select
+# Base version: filters out id=4
+_MODEL_BASE_SQL = b"""select
   id as customer_id,
   name
 from {{ source('raw', 'customers') }}
 where id <= 3
 order by id
-""",
-        encoding="utf-8",
-    )
+"""
+
+_MODEL_HEAD_SQL = b"""select
+  id as customer_id,
+  name
+from {{ source('raw', 'customers') }}
+where id <= 4
+order by id
+"""
 
-    (repo / "profiles.yml").write_text(
-        f"""mini_project:
+_PROFILES_YML = f"""mini_project:
   target: dev
   outputs:
     dev:
@@ -193,24 +331,55 @@ order by id
       port: {PG_PORT}
       dbname: {PG_DB}
       schema: core
-""",
-        encoding="utf-8",
-    )
+""".encode()
 
 
-def _git(cmd: list[str], repo: Path) -> str:
-    return _run(["git", "-C", str(repo), *cmd])
+def _write_fixture_project(repo: Path) -> None:
+    (repo / "models").mkdir(parents=True, exist_ok=True)
+    (repo / "dbt_project.yml").write_bytes(_DBT_PROJECT_YML)
+    (repo / "models" / "schema.yml").write_bytes(_SCHEMA_YML)
+    (repo / "models" / "dim_customers.sql").write_bytes(_MODEL_BASE_SQL)
+    (repo / "profiles.yml").write_bytes(_PROFILES_YML)
 
 
-def _build_cli_candidates(repo: Path) -> list[list[str]]:
-    """Build candidate command lines for both CLI shapes.
+def _commit_fixture_repo(repo: Path) -> None:
+    """Commit the project on `main`, and the head model on `feature/include-4`.
 
-    New shape:
-      dbt-model-diff diff <model> ...
-    Old shape:
-      dbt-model-diff <model> ...
+    Leaves `main` checked out. Both commits go through a single `git fast-import`.
     """
-    base_args = [
+    # One fast-import stream writes both commits straight into the object
+    # store; the checkout then only syncs the index with `main`.
+    blobs = [
+        ("dbt_project.yml", _DBT_PROJECT_YML),
+        ("models/schema.yml", _SCHEMA_YML),
+        ("models/dim_customers.sql", _MODEL_BASE_SQL),
+        ("profiles.yml", _PROFILES_YML),
+        ("models/dim_customers.sql", _MODEL_HEAD_SQL),
+    ]
+    stream = bytearray()
+    for mark, (_, data) in enumerate(blobs, 1):
+        stream += b"blob\nmark :%d\ndata %d\n%s\n" % (mark, len(data), data)
+    committer = b"committer Test <test@example.com> 1700000000 +0000\n"
+    stream += b"commit refs/heads/main\nmark :100\n" + committer + b"data 4\nbase\n"
+    for mark, (path, _) in enumerate(blobs[:4], 1):
+        stream += b"M 100644 :%d %s\n" % (mark, path.encode())
+    stream += b"\ncommit refs/heads/feature/include-4\n" + committer
+    stream += b"data 12\ninclude id=4\nfrom :100\nM 100644 :5 models/dim_customers.sql\n\n"
+    _run(
+        [
+            "sh",
+            "-c",
+            "set -e; git init -q; git fast-import --quiet; "
+            "git symbolic-ref HEAD refs/heads/main; git checkout -q -f",
+        ],
+        cwd=repo,
+        input=bytes(stream),
+    )
+
+
+def _diff_args(repo: Path) -> list[str]:
+    return [
+        "dim_customers",
         "--keys",
         "customer_id",
         "--base",
@@ -225,86 +394,158 @@ def _build_cli_candidates(repo: Path) -> list[list[str]]:
         "json",
     ]
 
-    cands: list[list[str]] = []
 
-    exe = "dbt-model-diff" if _have_cmd("dbt-model-diff") else None
-    py = os.environ.get("PYTHON", "python")
+@pytest.fixture
+def run_cli(pg_container: Future, monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    """Run dbt-model-diff in-process with the given args in a cwd and return its stdout.
 
-    if exe:
-        cands.append([exe, "diff", "dim_customers", *base_args])
-        cands.append([exe, "dim_customers", *base_args])  # backward compat
-    cands.append([py, "-m", "dbt_model_diff.cli", "diff", "dim_customers", *base_args])
-    cands.append([py, "-m", "dbt_model_diff.cli", "dim_customers", *base_args])  # backward compat
+    Depends on pg_container so that its tool checks skip first. The CLI's temp
+    dirs (its git worktrees and their dbt target/ output) go under tmp_path,
+    which tests/conftest.py puts in RAM where it can.
+    """
+    cli_tmp = tmp_path / "cli-tmp"
+    cli_tmp.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(cli_tmp))
+
+    def run(args: list[str], cwd: Path) -> bytes:
+        monkeypatch.chdir(cwd)
+        res = CliRunner().invoke(app, args)
+        if res.exception is not None and not isinstance(res.exception, SystemExit):
+            raise res.exception
+        assert res.exit_code == 0, res.output
+        return res.stdout_bytes
+
+    return run
+
+
+def _bring_up_postgres(keep: bool) -> _PsqlSession:
+    _build_image()
+    # With --keep-pg, a container kept by an earlier session is reused as long
+    # as it runs the current image: as is when running, else via `docker start`.
+    info = _container_info() if keep else None
+    if info is not None:
+        image = _run(["docker", "image", "inspect", "-f", "{{.Id}}", PG_IMAGE]).decode().strip()
+        if info[1] != image:
+            info = None
+    if info is not None and info[0] == "running":
+        pass
+    elif info is not None and info[0] in {"created", "exited"}:
+        # The tmpfs data directory starts empty again, so the entrypoint re-runs initdb.
+        _run(["docker", "start", PG_CONTAINER])
+        _wait_for_postgres()
+    else:
+        _start_postgres()
+        _wait_for_postgres()
+    return _PsqlSession().open()
 
-    return cands
 
+def _keep_pg(config: pytest.Config) -> bool:
+    return bool(
+        config.getoption("keep_pg", default=False) or os.environ.get("DBT_MODEL_DIFF_KEEP_PG")
+    )
 
-@pytest.mark.integration
-def test_postgres_e2e_diff(tmp_path: Path):
+
+@pytest.fixture(scope="session")
+def pg_container(pytestconfig: pytest.Config):
+    """Start one Postgres container for the session; yields a Future of a psql session on it.
+
+    The container comes up on a worker thread, so the first test can set up its
+    git repo meanwhile. Tests share the container (and skip its initdb +
+    restart); the `pg` fixture resets dbt's output per test. With --keep-pg (or
+    DBT_MODEL_DIFF_KEEP_PG=1) the container is left running for the next session.
+    """
+    # Checked before anything is started, so a missing tool skips cheaply.
     if not _have_cmd("docker"):
         pytest.skip("docker not installed")
     if not _have_cmd("git"):
         pytest.skip("git not installed")
     if not _have_cmd("dbt"):
         pytest.skip("dbt not installed (install dbt-postgres)")
-    if not _port_is_free(PG_PORT):
+    keep = _keep_pg(pytestconfig)
+    if not _port_is_free(PG_PORT) and not (
+        keep and (_container_info() or ("", ""))[0] == "running"
+    ):
         pytest.skip(f"port {PG_PORT} is busy; free it or change PG_PORT in test")
 
-    _start_postgres()
+    pool = ThreadPoolExecutor(max_workers=1)
+    fut = pool.submit(_bring_up_postgres, keep)
     try:
-        _wait_for_postgres()
-        _init_source_data()
+        yield fut
+    finally:
+        pool.shutdown()
+        if fut.exception() is None:
+            fut.result().close()
+        if not keep:
+            _docker_rm(PG_CONTAINER)
 
-        repo = tmp_path / "repo"
-        repo.mkdir(parents=True, exist_ok=True)
-        _write_fixture_project(repo)
 
-        _git(["init"], repo)
-        _git(["config", "user.email", "test@example.com"], repo)
-        _git(["config", "user.name", "Test"], repo)
+@pytest.fixture
+def pg(pg_container: Future) -> _PsqlSession:
+    """The session's psql, with dbt's schema from earlier tests dropped.
 
-        _git(["add", "."], repo)
-        _git(["commit", "-m", "base"], repo)
-        _git(["branch", "-M", "main"], repo)
+    Blocks until the container is ready. The seeded raw schema is only ever
+    read, so it is shared as is.
+    """
+    psql = pg_container.result()
+    psql.run("drop schema if exists core cascade;")
+    return psql
 
-        _git(["checkout", "-b", "feature/include-4"], repo)
-        (repo / "models" / "dim_customers.sql").write_text(
-            """select
-  id as customer_id,
-  name
-from {{ source('raw', 'customers') }}
-where id <= 4
-order by id
-""",
-            encoding="utf-8",
-        )
-        _git(["add", "models/dim_customers.sql"], repo)
-        _git(["commit", "-m", "include id=4"], repo)
-        _git(["checkout", "main"], repo)
-
-        last_err = ""
-        out = None
-        for cmd in _build_cli_candidates(repo):
-            ok, txt = _try_run(cmd, cwd=repo)
-            if ok:
-                out = txt
-                break
-            last_err = txt
-
-        if out is None:
-            raise RuntimeError(
-                "Could not run dbt-model-diff with any known CLI shape. Last error:\n" + last_err
-            )
-
-        result = json.loads(out)
-
-        assert result["rowcounts"]["base"] == 3
-        assert result["rowcounts"]["head"] == 4
-
-        rd = result["row_diff"]
-        assert rd["added"] == 1
-        assert rd["removed"] == 0
-        assert rd["changed"] == 0
 
-    finally:
-        _docker_rm(PG_CONTAINER)
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    """The fixture dbt project, committed on `main` and `feature/include-4`.
+
+    Request it before `pg` so it is set up while the container starts.
+    """
+    repo = tmp_path / "repo"
+    repo.mkdir(parents=True, exist_ok=True)
+    _write_fixture_project(repo)
+
+    _commit_fixture_repo(repo)
+    return repo
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    ("extra_args", "added"),
+    [
+        pytest.param([], 1, id="full"),
+        pytest.param(["--bucket-diff"], 1, id="bucket-diff"),
+        # Key 4 hashes to slot 3756 of 10000, inside the sampled half, so its
+        # added row is counted and scaled back up by 2.
+        pytest.param(["--sample-fraction", "0.5"], 2, id="sample-fraction"),
+    ],
+)
+def test_postgres_e2e_diff(
+    run_cli, repo: Path, pg: _PsqlSession, extra_args: list[str], added: int
+):
+    out = run_cli([*_diff_args(repo), *extra_args], cwd=repo)
+    result = _load_json_output(out)
+
+    assert result["rowcounts"]["base"] == 3
+    assert result["rowcounts"]["head"] == 4
+
+    rd = result["row_diff"]
+    assert rd["added"] == added
+    assert rd["removed"] == 0
+    assert rd["changed"] == 0
+
+
+@pytest.mark.integration
+def test_postgres_e2e_partitioned_join(run_cli, repo: Path, pg: _PsqlSession, monkeypatch):
+    # A one-row threshold splits the 4-row diff join into 4 key-hash partitions.
+    monkeypatch.setattr(PostgresAdapter, "join_partition_rows", 1)
+    split = PostgresAdapter.create_partitioned_scratch_table
+    parts: list[int] = []
+
+    def record_split(self, conn, schema, table, select_sql, part_expr, n):
+        parts.append(n)
+        return split(self, conn, schema, table, select_sql, part_expr, n)
+
+    monkeypatch.setattr(PostgresAdapter, "create_partitioned_scratch_table", record_split)
+    result = _load_json_output(run_cli(_diff_args(repo), cwd=repo))
+    assert parts == [4, 4]
+
+    assert result["rowcounts"] == {"base": 3, "head": 4}
+    rd = result["row_diff"]
+    assert (rd["added"], rd["removed"], rd["changed"]) == (1, 0, 0)
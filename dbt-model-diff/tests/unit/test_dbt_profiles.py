@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+
+from dbt_model_diff.core import dbt_profiles
+from dbt_model_diff.core.dbt_profiles import _load_yaml
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(dbt_profiles, "_YAML_CACHE", OrderedDict())
+
+
+def test_load_yaml_returns_independent_copies(tmp_path: Path):
+    path = tmp_path / "profiles.yml"
+    path.write_text("p:\n  outputs:\n    dev: {host: h}\n")
+    first = _load_yaml(path)
+    first["p"]["outputs"]["dev"]["host"] = "mutated"
+    assert _load_yaml(path) == {"p": {"outputs": {"dev": {"host": "h"}}}}
+
+
+def test_load_yaml_reparses_a_changed_file(tmp_path: Path):
+    path = tmp_path / "profiles.yml"
+    path.write_text("a: 1\n")
+    assert _load_yaml(path) == {"a": 1}
+    path.write_text("a: 22\n")
+    assert _load_yaml(path) == {"a": 22}
+
+
+def test_load_yaml_cache_is_bounded_lru(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(dbt_profiles, "_YAML_CACHE_MAX", 2)
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.yml"
+        path.write_text(f"{name}: 1\n")
+        paths.append(path)
+
+    _load_yaml(paths[0])
+    _load_yaml(paths[1])
+    _load_yaml(paths[0])  # a is now the most recently used
+    _load_yaml(paths[2])
+
+    assert list(dbt_profiles._YAML_CACHE) == [str(paths[0]), str(paths[2])]
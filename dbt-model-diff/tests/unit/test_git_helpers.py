@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from dbt_model_diff.core import diff_flow
+from dbt_model_diff.core.diff_flow import (
+    _checkout_worktree,
+    _prune_worktree_cache,
+    _same_project,
+    _worktree_at,
+)
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def _commit(repo: Path, files: dict[str, str], message: str) -> str:
+    for name, text in files.items():
+        path = repo / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", message)
+    return _git(repo, "rev-parse", "HEAD").strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    """A repo with the dbt project in proj/ and a macro package in shared/, on `main`."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    _commit(
+        repo,
+        {
+            "proj/dbt_project.yml": "name: proj\n",
+            "proj/models/a.sql": "select 1 as x\n",
+            "shared/macros/m.sql": "{% macro m() %}1{% endmacro %}\n",
+            "README.md": "docs\n",
+        },
+        "base",
+    )
+    return repo
+
+
+def _branch(repo: Path, name: str, files: dict[str, str]) -> None:
+    _git(repo, "checkout", "-q", "-b", name, "main")
+    _commit(repo, files, name)
+    _git(repo, "checkout", "-q", "main")
+
+
+def test_same_project_ignores_changes_outside_the_project(repo: Path):
+    _branch(repo, "docs", {"README.md": "more docs\n", "shared/macros/m.sql": "changed\n"})
+    assert _same_project(repo, Path("proj"), "main", "docs")
+
+
+def test_same_project_detects_model_change(repo: Path):
+    _branch(repo, "model", {"proj/models/a.sql": "select 2 as x\n"})
+    assert not _same_project(repo, Path("proj"), "main", "model")
+
+
+def test_same_project_with_local_package_compares_the_whole_repo(repo: Path):
+    _commit(repo, {"proj/packages.yml": "packages:\n  - local: ../shared\n"}, "local package")
+    _branch(repo, "macro", {"shared/macros/m.sql": "changed\n"})
+    _branch(repo, "docs", {"README.md": "more docs\n"})
+    assert not _same_project(repo, Path("proj"), "main", "macro")
+    # The whole repo is compared, so even a change no package uses counts.
+    assert not _same_project(repo, Path("proj"), "main", "docs")
+    assert _same_project(repo, Path("proj"), "main", "main")
+
+
+def test_same_project_at_repo_root(repo: Path):
+    _branch(repo, "docs", {"README.md": "more docs\n"})
+    assert not _same_project(repo, Path("."), "main", "docs")
+    assert _same_project(repo, Path("."), "main", "main")
+
+
+def _add_worktree(repo: Path, wt: Path, ref: str = "main") -> None:
+    _git(repo, "worktree", "add", "-q", "--force", "--no-checkout", str(wt), ref)
+
+
+def test_checkout_worktree_writes_only_the_project(repo: Path, tmp_path: Path):
+    wt = tmp_path / "wt"
+    _add_worktree(repo, wt)
+    _checkout_worktree(wt, Path("proj"), workers=1)
+    assert (wt / "proj" / "models" / "a.sql").read_text() == "select 1 as x\n"
+    assert not (wt / "shared").exists()
+    assert not (wt / "README.md").exists()
+
+
+def test_checkout_worktree_writes_everything_for_local_packages(repo: Path, tmp_path: Path):
+    _commit(repo, {"proj/packages.yml": "packages:\n  - local: ../shared\n"}, "local package")
+    wt = tmp_path / "wt"
+    _add_worktree(repo, wt)
+    _checkout_worktree(wt, Path("proj"), workers=1)
+    assert (wt / "shared" / "macros" / "m.sql").exists()
+    assert (wt / "README.md").exists()
+
+
+def test_worktree_at(repo: Path, tmp_path: Path):
+    sha = _git(repo, "rev-parse", "main").strip()
+    wt = tmp_path / "wt"
+    _add_worktree(repo, wt)
+    assert _worktree_at(wt, sha)
+    assert not _worktree_at(wt, "0" * 40)
+    assert not _worktree_at(tmp_path / "missing", sha)
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    assert not _worktree_at(plain, sha)
+
+
+def test_prune_worktree_cache_keeps_the_most_recently_used(repo: Path, tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(diff_flow, "WORKTREE_CACHE_MAX", 3)
+    cache = tmp_path / "cache"
+    wts = [cache / f"wt{i}" for i in range(6)]
+    for i, wt in enumerate(wts):
+        _add_worktree(repo, wt)
+        os.utime(wt, (1_000_000 + i, 1_000_000 + i))
+
+    # wt0 is the oldest but in use by this run, so it stays and counts towards the bound.
+    _prune_worktree_cache(repo, cache, {wts[0]})
+
+    assert sorted(p.name for p in cache.iterdir()) == ["wt0", "wt4", "wt5"]
+    listed = _git(repo, "worktree", "list", "--porcelain")
+    assert str(wts[4]) in listed
+    assert str(wts[1]) not in listed
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import datetime
+import decimal
+import io
+
+import pytest
+
+from dbt_model_diff.formatters import json_fmt
+
+RESULT = {
+    "meta": {"model": "dim_customers", "keys": ["customer_id", "day"]},
+    "rowcounts": {"base": 3, "head": 4},
+    "row_diff": {
+        "added": 1,
+        "sample_keys": [
+            (1, datetime.date(2024, 1, 2)),
+            (2, datetime.datetime(2024, 1, 2, 3, 4, 5)),
+            (3, decimal.Decimal("1.50")),
+            (4, None),
+        ],
+    },
+}
+
+
+def _stdlib_render(monkeypatch) -> str:
+    with monkeypatch.context() as m:
+        m.setattr(json_fmt, "orjson", None)
+        return json_fmt.render(RESULT)
+
+
+def test_render_without_orjson_stringifies_values(monkeypatch):
+    out = _stdlib_render(monkeypatch)
+    assert '"2024-01-02 03:04:05"' in out
+    assert '"1.50"' in out
+
+
+def test_render_matches_stdlib_with_orjson(monkeypatch):
+    if json_fmt.orjson is None:
+        pytest.skip("orjson not installed")
+    assert json_fmt.render(RESULT) == _stdlib_render(monkeypatch)
+
+
+def test_write_matches_render():
+    buffered = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    json_fmt.write(RESULT, buffered)
+    buffered.seek(0)
+    plain = io.StringIO()
+    json_fmt.write(RESULT, plain)
+    assert buffered.read() == plain.getvalue() == json_fmt.render(RESULT) + "\n"
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from dbt_model_diff.formatters.markdown_fmt import _md_table, render
+
+
+def test_md_table():
+    lines = ["intro"]
+    _md_table(lines, ["a", "b"], iter([["1", "2"], ["3", "4"]]))
+    assert lines == ["intro", "| a | b |", "|---|---|", "| 1 | 2 |", "| 3 | 4 |"]
+
+
+def test_render_sample_keys_and_estimate_note():
+    out = render(
+        {
+            "meta": {
+                "model": "dim_customers",
+                "base": "main",
+                "head": "HEAD",
+                "mode": "FULL_DIFF",
+                "keys": ["id", "day"],
+                "sample_fraction": 0.25,
+            },
+            "rowcounts": {"base": 3, "head": 4},
+            "row_diff": {"added": 4, "removed": 0, "changed": 8, "sample_keys": [(1, "2024-01-02"), (2, None)]},
+        }
+    )
+    assert "_Estimated from 25% of keys._" in out
+    assert "| id | day |\n|---|---|\n| 1 | 2024-01-02 |\n| 2 | None |" in out
+    assert not out.endswith("\n")